@@ -9,23 +9,79 @@ from telegram.ext import ContextTypes
 from bot.security.authenticator import require_auth
 from config.dca_config import config
 from config.strategy_config import strategy_config
-import ccxt
+import ccxt.async_support as ccxt
 import asyncio
+import threading
 import requests
-import pandas as pd
-import pandas_ta as ta
 import logging
-from typing import Optional, Dict, Any
+from collections import deque
+from typing import Optional, Dict, Any, Tuple
 from tools.setup_logging import setup_logging
 
 logger = setup_logging(__name__)
 
-# 交易所實例
-exchange = ccxt.okx()
-
 # 簡單的內存快取
 _cache = {}
 
+# 共用的非同步交易所實例（重用連線，避免每次查詢重新握手與載入市場）
+# aiohttp session 綁定事件循環：Bot 的循環與排程器執行緒內 asyncio.run 的循環各自持有一個實例，
+# 以循環為鍵存放；兩個執行緒都會存取，字典的讀寫以鎖保護
+_exchanges: Dict[asyncio.AbstractEventLoop, ccxt.Exchange] = {}
+_exchanges_lock = threading.Lock()
+
+
+async def get_exchange() -> ccxt.Exchange:
+    """取得目前事件循環的共用交易所實例（首次使用時載入市場）"""
+    loop = asyncio.get_running_loop()
+    with _exchanges_lock:
+        exchange = _exchanges.get(loop)
+        created = exchange is None
+        if created:
+            exchange = ccxt.okx({'enableRateLimit': True})
+            _exchanges[loop] = exchange
+    
+    if created:
+        await exchange.load_markets()
+    return exchange
+
+
+async def close_exchange():
+    """關閉目前事件循環的共用交易所實例（事件循環結束前呼叫；其他循環的實例不受影響）"""
+    with _exchanges_lock:
+        exchange = _exchanges.pop(asyncio.get_running_loop(), None)
+    
+    if exchange is not None:
+        await exchange.close()
+
+# F&G 模式訊息模板（模組載入時建立一次）
+_FG_MESSAGE_TEMPLATE = """
+💰 **Smart DCA 本週建議（F&G Enhanced）**
+
+{emoji} **{recommendation}**
+
+**市場狀態**
+BTC價格：${current_price:,.2f}
+RSI({rsi_period})：{rsi:.1f}
+MA{ma_period}：${ma200:,.2f}
+{fg_line}
+**分析**
+{reason}
+
+**本週建議**
+${usd_amt:.0f} ({multiplier}x) ≈ NT${twd_amt:,}
+
+**執行策略**
+• 時間：週一至週三分批執行
+• 紀律：永不賣出，長期持有
+• 目標：持續累積BTC
+
+**自動排程**
+📅 下次推送：{next_push_str}
+🔔 固定時間：每週日晚上 8:00（台北時間）
+
+📊 數據源：OKX + Fear & Greed Index
+""".strip()
+
 
 class DCAAnalysisError(Exception):
     """DCA 分析錯誤"""
@@ -132,68 +188,116 @@ async def get_usd_twd_rate() -> float:
         return config.default_usd_twd
 
 
-def calculate_rsi_robust(ohlcv: list, period: int = None) -> float:
+class _DailyIndicatorState:
     """
-    穩健的 RSI 計算（使用 pandas_ta）
-    
-    Args:
-        ohlcv: OHLCV 數據
-        period: RSI 週期
-    
-    Returns:
-        float: RSI 值
-    
-    Raises:
-        ValueError: RSI 計算失敗
+    日線 RSI / MA 增量狀態
+    - 冷啟動以完整 K 線初始化，之後每根新收盤 K 線 O(1) 更新，重複查詢只需抓最新幾根
+    - RSI 為 pandas_ta 的 RMA（ewm(alpha=1/週期, adjust=True)）：漲跌幅各自以 decay 遞迴累加，
+      權重和在 gain / (gain + loss) 中相同可約去，不需另外記錄
     """
-    if period is None:
-        period = config.rsi_period
-    
-    # 轉換為 DataFrame
-    df = pd.DataFrame(
-        ohlcv,
-        columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-    )
-    
-    # 移除最後一根未收盤的 K 線
-    df = df[:-1]
-    
-    # 計算 RSI
-    df['rsi'] = ta.rsi(df['close'], length=period)
-    
-    # 驗證
-    rsi_value = df['rsi'].iloc[-1]
-    if pd.isna(rsi_value):
-        raise ValueError("RSI 計算失敗（NaN）")
-    
-    if not 0 <= rsi_value <= 100:
-        raise ValueError(f"RSI 值異常: {rsi_value}")
     
-    return float(rsi_value)
+    DAY_MS = 86_400_000
+    
+    def __init__(self, rsi_period: int, ma_period: int):
+        self.rsi_period = rsi_period
+        self.ma_period = ma_period
+        self.decay = 1.0 - 1.0 / rsi_period
+        self.reset()
+    
+    def reset(self):
+        self.last_ts = None
+        self.last_close = None
+        self.gain_sum = 0.0
+        self.loss_sum = 0.0
+        self.n_diff = 0
+        self.window = deque(maxlen=self.ma_period)
+        self.ma_sum = 0.0
+    
+    @property
+    def warm(self) -> bool:
+        return self.n_diff >= self.rsi_period and len(self.window) == self.ma_period
+    
+    def update(self, ohlcv: list) -> bool:
+        """
+        寫入已收盤 K 線（忽略最後一根未收盤）
+        
+        Returns:
+            bool: False 表示與既有狀態不連續（例如長時間未查詢），需重抓完整歷史
+        """
+        closed = ohlcv[:-1]
+        if self.last_ts is not None and closed and closed[0][0] > self.last_ts + self.DAY_MS:
+            return False
+        
+        for candle in closed:
+            ts, close = candle[0], float(candle[4])
+            if self.last_ts is not None and ts <= self.last_ts:
+                continue
+            
+            if self.last_close is not None:
+                diff = close - self.last_close
+                self.gain_sum = self.decay * self.gain_sum + max(diff, 0.0)
+                self.loss_sum = self.decay * self.loss_sum + max(-diff, 0.0)
+                self.n_diff += 1
+            
+            if len(self.window) == self.ma_period:
+                self.ma_sum -= self.window[0]
+            self.window.append(close)
+            self.ma_sum += close
+            
+            self.last_ts = ts
+            self.last_close = close
+        return True
+    
+    def rsi(self) -> float:
+        """最新 RSI（差分數不足一個週期或漲跌皆為 0 時視為計算失敗）"""
+        total = self.gain_sum + self.loss_sum
+        if self.n_diff < self.rsi_period or total == 0:
+            raise ValueError("RSI 計算失敗（NaN）")
+        
+        rsi_value = 100.0 * self.gain_sum / total
+        if not 0 <= rsi_value <= 100:
+            raise ValueError(f"RSI 值異常: {rsi_value}")
+        return rsi_value
+    
+    def ma(self) -> float:
+        """最新 MA"""
+        return self.ma_sum / len(self.window)
+
+
+# 每個幣種一份增量狀態；Bot 循環與排程器執行緒都會更新，重設 / 寫入 / 讀取以鎖保護
+_indicator_states: Dict[str, _DailyIndicatorState] = {}
+_indicator_states_lock = threading.Lock()
 
+# 狀態已就緒時只抓最新幾根日線
+INCREMENTAL_OHLCV_LIMIT = 5
 
-def calculate_ma(ohlcv: list, period: int = None) -> float:
+
+async def update_daily_indicators(exchange: ccxt.Exchange, symbol: str) -> Tuple[float, float]:
     """
-    計算移動平均
-    
-    Args:
-        ohlcv: OHLCV 數據
-        period: MA 週期
+    抓取日線並增量更新 RSI / MA 狀態
+    - 網路請求在鎖外進行（不可持鎖 await），每段狀態操作在鎖內一次完成
+    - 增量資料不連續或狀態未就緒（例如另一個執行緒剛重設）時，重抓完整歷史並在鎖內重建
     
     Returns:
-        float: MA 值
+        (RSI, MA)
     """
-    if period is None:
-        period = config.ma_period
-    
-    df = pd.DataFrame(
-        ohlcv,
-        columns=['timestamp', 'open', 'high', 'low', 'close', 'volume']
-    )
-    df = df[:-1]  # 移除未收盤
-    
-    ma_value = df['close'].tail(period).mean()
-    return float(ma_value)
+    with _indicator_states_lock:
+        state = _indicator_states.get(symbol)
+        if state is None or (state.rsi_period, state.ma_period) != (config.rsi_period, config.ma_period):
+            state = _DailyIndicatorState(config.rsi_period, config.ma_period)
+            _indicator_states[symbol] = state
+        limit = INCREMENTAL_OHLCV_LIMIT if state.warm else config.ohlcv_limit
+    
+    ohlcv = await exchange.fetch_ohlcv(symbol, '1d', limit=limit)
+    with _indicator_states_lock:
+        if state.update(ohlcv) and state.warm:
+            return state.rsi(), state.ma()
+    
+    ohlcv = await exchange.fetch_ohlcv(symbol, '1d', limit=config.ohlcv_limit)
+    with _indicator_states_lock:
+        state.reset()
+        state.update(ohlcv)
+        return state.rsi(), state.ma()
 
 
 def determine_multiplier(fg_score: Optional[int], rsi: float) -> Dict[str, Any]:
@@ -298,26 +402,25 @@ async def get_fg_analysis() -> str:
         str: 格式化的分析訊息
     """
     try:
-        # 1. 獲取 BTC 數據
+        exchange = await get_exchange()
+        
+        # 1. 同時獲取 BTC 行情、日線指標、Fear & Greed、匯率（總耗時 = 最慢的一個請求）
+        #    F&G 與匯率各自有降級處理，不會拋出例外
         symbol = 'BTC/USDT'
-        ticker = await asyncio.to_thread(exchange.fetch_ticker, symbol)
-        ohlcv = await asyncio.to_thread(
-            exchange.fetch_ohlcv,
-            symbol,
-            '1d',
-            limit=config.ohlcv_limit
+        ticker, (rsi, ma200), fg_score, usd_to_twd = await asyncio.gather(
+            exchange.fetch_ticker(symbol),
+            update_daily_indicators(exchange, symbol),
+            get_fear_greed_index(),
+            get_usd_twd_rate()
         )
         
         current_price = ticker['last']
         logger.info(f"BTC Price: ${current_price:,.2f}")
         
-        # 2. 計算技術指標
-        rsi = calculate_rsi_robust(ohlcv)
-        ma200 = calculate_ma(ohlcv, config.ma_period)
+        # 2. 技術指標（增量狀態，首次查詢才需要完整歷史）
         logger.info(f"RSI: {rsi:.1f}, MA200: ${ma200:,.2f}")
         
-        # 3. 獲取 Fear & Greed（可選）
-        fg_score = await get_fear_greed_index()
+        # 3. Fear & Greed 分類（可選）
         fg_class = "無法獲取"
         if fg_score is not None:
             if fg_score < 20:
@@ -331,9 +434,6 @@ async def get_fg_analysis() -> str:
             else:
                 fg_class = "Extreme Greed"
         
-        # 4. 獲取匯率
-        usd_to_twd = await get_usd_twd_rate()
-        
         # 5. 決定買入倍數
         decision = determine_multiplier(fg_score, rsi)
         
@@ -360,40 +460,22 @@ async def get_fg_analysis() -> str:
         next_push_str = next_push.strftime('%m/%d（%a）晚上 8:00')
         
         # 8. 組合訊息
-        message = f"""
-💰 **Smart DCA 本週建議（F&G Enhanced）**
-
-{decision['emoji']} **{decision['recommendation']}**
-
-**市場狀態**
-BTC價格：${current_price:,.2f}
-RSI({config.rsi_period})：{rsi:.1f}
-MA{config.ma_period}：${ma200:,.2f}
-"""
-        
-        if fg_score is not None:
-            message += f"Fear & Greed：{fg_score} ({fg_class})\n"
-        
-        message += f"""
-**分析**
-{decision['reason']}
-
-**本週建議**
-${usd_amt:.0f} ({decision['multiplier']}x) ≈ NT${twd_amt:,}
-
-**執行策略**
-• 時間：週一至週三分批執行
-• 紀律：永不賣出，長期持有
-• 目標：持續累積BTC
-
-**自動排程**
-📅 下次推送：{next_push_str}
-🔔 固定時間：每週日晚上 8:00（台北時間）
-
-📊 數據源：OKX + Fear & Greed Index
-"""
-        
-        return message.strip()
+        fg_line = f"Fear & Greed：{fg_score} ({fg_class})\n" if fg_score is not None else ""
+        return _FG_MESSAGE_TEMPLATE.format_map({
+            'emoji': decision['emoji'],
+            'recommendation': decision['recommendation'],
+            'reason': decision['reason'],
+            'multiplier': decision['multiplier'],
+            'current_price': current_price,
+            'rsi_period': config.rsi_period,
+            'rsi': rsi,
+            'ma_period': config.ma_period,
+            'ma200': ma200,
+            'fg_line': fg_line,
+            'usd_amt': usd_amt,
+            'twd_amt': twd_amt,
+            'next_push_str': next_push_str,
+        })
     
     except Exception as e:
         logger.error(f"F&G DCA 分析失敗: {e}", exc_info=True)
@@ -412,7 +494,8 @@ async def get_mvrv_analysis() -> str:
         
         # 1. 獲取當前價格
         symbol = 'BTC/USDT'
-        ticker = await asyncio.to_thread(exchange.fetch_ticker, symbol)
+        exchange = await get_exchange()
+        ticker = await exchange.fetch_ticker(symbol)
         current_price = ticker['last']
         
         # 2. 獲取 MVRV 分析（暫時不傳入position_manager，未來可擴展）
@@ -5,12 +5,10 @@
 from telegram import Update
 from telegram.ext import ContextTypes
 from bot.security.authenticator import require_auth
-import ccxt
+from bot.handlers.dca import get_exchange
+import ccxt.async_support as ccxt
 import asyncio
 
-# 使用 OKX 作為數據源
-exchange = ccxt.okx()
-
 
 @require_auth('view')
 async def market_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -29,9 +27,12 @@ async def market_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # 發送處理中訊息
         processing_msg = await update.message.reply_text(f"🔍 正在查詢 {symbol} 數據...")
         
-        # 獲取市場數據
-        ticker = await asyncio.to_thread(exchange.fetch_ticker, symbol)
-        ohlcv = await asyncio.to_thread(exchange.fetch_ohlcv, symbol, '4h', limit=24)
+        # 獲取市場數據：與 DCA 共用 OKX 非同步實例，行情與 K 線同時請求
+        exchange = await get_exchange()
+        ticker, ohlcv = await asyncio.gather(
+            exchange.fetch_ticker(symbol),
+            exchange.fetch_ohlcv(symbol, '4h', limit=24)
+        )
         
         # 計算 24h 變化
         change_24h = ticker.get('percentage', 0)
@@ -57,6 +57,12 @@ class BotScheduler:
             
         except Exception as e:
             logger.error(f"❌ 發送每週 DCA 失敗: {e}")
+        
+        finally:
+            # 本次 asyncio.run 的事件循環即將關閉，釋放共用交易所連線
+            from bot.handlers.dca import close_exchange
+            await close_exchange()
+    
     def start(self):
         """啟動排程"""
         # 每週日晚上 8:00（台北時間）
@@ -125,6 +125,9 @@ class CryptoTradingBot:
             await self.app.updater.stop()
             await self.app.stop()
             await self.app.shutdown()
+            
+            from bot.handlers.dca import close_exchange
+            await close_exchange()
 
 
 def main():
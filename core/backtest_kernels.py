@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# core/backtest_kernels.py
+"""
+回測用的 Numba 核心
+- 輸入皆為連續的 NumPy 陣列，迴圈內只做純量比較
+- K 線價格可直接傳 float32（本地數據載入時已降轉），與 float64 止損/止盈比較時精確提升
+- nogil=True：可直接用執行緒平行化；scan_exits_parallel 以 prange 依交易分配到各核心
+- sfp_trend_signals：訊號條件融合成單次遍歷，不產生中間布林陣列
+"""
+
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True, nogil=True)
+def _first_exit(high, low, start, end, is_long, sl, tp):
+    """
+    單筆交易從 start 往後掃描到 end（不含），回傳 (K 線索引, 1 WIN / -1 LOSS)；未出場為 (-1, 0)
+    同一根 K 線同時觸及時，以止損優先（保守假設）
+
+    多空共用同一個迴圈：做多看最低價碰止損、最高價碰止盈，做空相反；
+    以方向 sign 乘上價差統一比較（浮點相減的正負號是精確的，與直接比較大小等價）
+    """
+    stop_px = low if is_long else high
+    target_px = high if is_long else low
+    sign = 1.0 if is_long else -1.0
+    for j in range(start, end):
+        if sign * (stop_px[j] - sl) <= 0:
+            return j, -1
+        if sign * (target_px[j] - tp) >= 0:
+            return j, 1
+    return -1, 0
+
+
+@njit(cache=True, nogil=True)
+def scan_exits(high, low, entry_idx, signal, sl, tp, max_bars):
+    """
+    逐筆交易往後掃描，找出先觸及止損或止盈的 K 線
+
+    Args:
+        high, low: K 線最高 / 最低價（float32 或 float64）
+        entry_idx: 每筆交易開始檢查的 K 線索引
+        signal: +1 (LONG) / -1 (SHORT)
+        sl, tp: 每筆交易的止損 / 止盈價
+        max_bars: 最多往後檢查幾根 K 線（含 entry_idx 本身）
+
+    Returns:
+        (exit_idx, exit_price, result)：result 為 1 (WIN) / -1 (LOSS) / 0 (未出場)，
+        未出場的交易 exit_idx 為 -1、exit_price 為 NaN
+    """
+    n = high.shape[0]
+    m = entry_idx.shape[0]
+    exit_idx = np.full(m, -1, dtype=np.int64)
+    exit_price = np.full(m, np.nan)
+    result = np.zeros(m, dtype=np.int8)
+
+    for k in range(m):
+        start = entry_idx[k]
+        j, r = _first_exit(high, low, start, min(start + max_bars, n), signal[k] > 0, sl[k], tp[k])
+        if r != 0:
+            result[k] = r
+            exit_idx[k] = j
+            exit_price[k] = sl[k] if r < 0 else tp[k]
+
+    return exit_idx, exit_price, result
+
+
+@njit(cache=True, nogil=True, parallel=True)
+def scan_exits_parallel(high, low, entry_idx, signal, sl, tp, max_bars):
+    """
+    scan_exits 的多核心版本：參數與回傳值相同
+    - 每筆交易互相獨立，只寫入自己的輸出位置，以 prange 分配到各核心
+    - 適合單一行程的完整區間回測；已用進程池平行的入口（statistical_backtest）仍用 scan_exits，避免超額訂閱
+    """
+    n = high.shape[0]
+    m = entry_idx.shape[0]
+    exit_idx = np.full(m, -1, dtype=np.int64)
+    exit_price = np.full(m, np.nan)
+    result = np.zeros(m, dtype=np.int8)
+
+    for k in prange(m):
+        start = entry_idx[k]
+        j, r = _first_exit(high, low, start, min(start + max_bars, n), signal[k] > 0, sl[k], tp[k])
+        if r != 0:
+            result[k] = r
+            exit_idx[k] = j
+            exit_price[k] = sl[k] if r < 0 else tp[k]
+
+    return exit_idx, exit_price, result
+
+
+@njit(cache=True, nogil=True)
+def sfp_trend_signals(high, low, close, adx, rsi, swing_high, swing_low, bb_upper, bb_lower, bw, ema, atr):
+    """
+    Hybrid SFP 訊號（verify_three_strategies 的規則），逐根一次判定完所有條件
+    - SFP 做空優先，其次 SFP 做多；都沒有時才看趨勢突破（多優先於空）
+    - 指標為 NaN 時比較結果為 False，暖機期自然無訊號
+
+    Returns:
+        (signal, stop)：signal 為 +1 (LONG) / -1 (SHORT) / 0，無訊號的 stop 為 NaN
+    """
+    n = close.shape[0]
+    signal = np.zeros(n, dtype=np.int8)
+    stop = np.full(n, np.nan)
+
+    for i in range(n):
+        c = close[i]
+        if adx[i] > 30:
+            if high[i] > swing_high[i] and c < swing_high[i] and rsi[i] > 60:
+                signal[i] = -1
+                stop[i] = high[i]
+                continue
+            if low[i] < swing_low[i] and c > swing_low[i] and rsi[i] < 40:
+                signal[i] = 1
+                stop[i] = low[i]
+                continue
+        if adx[i] > 25 and bw[i] > 5:
+            if c > bb_upper[i] and c > ema[i]:
+                signal[i] = 1
+                stop[i] = c - 2 * atr[i]
+            elif c < bb_lower[i] and c < ema[i]:
+                signal[i] = -1
+                stop[i] = c + 2 * atr[i]
+
+    return signal, stop
+
+
+@njit(cache=True, nogil=True)
+def settle_fixed_risk(result, equity, risk_pct, reward_ratio):
+    """
+    依序結算交易：每筆風險為當下權益的 risk_pct，贏得 reward_ratio 倍風險
+
+    Args:
+        result: scan_exits 回傳的 1 (WIN) / -1 (LOSS) / 0 (未出場，略過)
+        equity: 初始權益
+
+    Returns:
+        (pnl, outcome, final_equity)：只含已出場交易，陣列長度即交易數
+    """
+    m = 0
+    for k in range(result.shape[0]):
+        if result[k] != 0:
+            m += 1
+
+    pnl = np.empty(m)
+    outcome = np.empty(m, dtype=np.int8)
+    t = 0
+    for k in range(result.shape[0]):
+        if result[k] == 0:
+            continue
+        risk_amt = equity * risk_pct
+        pnl[t] = risk_amt * reward_ratio if result[k] > 0 else -risk_amt
+        outcome[t] = result[k]
+        equity += pnl[t]
+        t += 1
+
+    return pnl, outcome, equity
+
+
+@njit(cache=True, nogil=True)
+def simulate_close_exits(open_, close, signal_idx, signal, stop, end, equity, risk_pct, reward_ratio):
+    """
+    單一持倉、以收盤價判定出場的逐筆模擬（verify_three_strategies 的規則）
+    - 第 i 根出訊號：以第 i+1 根開盤價進場，從第 i 根收盤起檢查到 end（不含），止盈優先於止損
+    - 倉位 = 當下權益 * risk_pct / 止損距離；持倉期間的訊號略過，出場當根不再進場
+    - 止損距離為 0 的訊號略過
+
+    Args:
+        signal_idx: 依時間排序的訊號 K 線索引
+        signal: +1 (LONG) / -1 (SHORT)
+        stop: 每個訊號的止損價
+
+    Returns:
+        (pnl, outcome, final_equity)：只含已出場交易，outcome 為 1 (WIN) / -1 (LOSS)
+    """
+    m = signal_idx.shape[0]
+    pnl = np.empty(m)
+    outcome = np.empty(m, dtype=np.int8)
+    t = 0
+    next_free = 0
+
+    for k in range(m):
+        i = signal_idx[k]
+        if i < next_free:
+            continue
+
+        side = signal[k]
+        sl = stop[k]
+        entry = open_[i + 1]
+        dist = abs(entry - sl)
+        if dist == 0:
+            continue
+        tp = entry + side * dist * reward_ratio
+        size = equity * risk_pct / dist
+
+        # 多空共用同一個迴圈：以方向乘上價差比較（side * (c - tp) >= 0 即到達止盈）
+        exit_j = -1
+        win = False
+        for j in range(i, end):
+            c = close[j]
+            if side * (c - tp) >= 0:
+                win = True
+            elif side * (c - sl) > 0:
+                continue
+            exit_j = j
+            break
+
+        # 持倉到資料結束仍未出場：不計入交易，之後也不會再有新倉
+        if exit_j < 0:
+            break
+
+        exit_price = tp if win else sl
+        pnl[t] = side * (exit_price - entry) * size
+        outcome[t] = 1 if win else -1
+        equity += pnl[t]
+        t += 1
+        next_free = exit_j + 1
+
+    return pnl[:t], outcome[:t], equity
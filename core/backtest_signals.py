@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# core/backtest_signals.py
+"""
+回測共用的數據載入、指標欄位與進場訊號
+- statistical_backtest（抽樣區間）與 final_system_backtest（完整區間）共用同一份規則，只在入口決定時間框架與出場掃描方式
+- 指標皆來自 core.indicator_kernels 的 Numba 核心，兩個入口共用同一份 JIT 快取
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+import polars as pl
+from numpy.lib.stride_tricks import sliding_window_view
+
+from core.indicator_kernels import ema200, rsi14, atr14, adx14, bb20, swing50
+
+OHLCV_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+
+def load_ohlcv(path_csv):
+    """
+    載入 OHLCV CSV；首次解析後另存 Parquet，之後直接讀取（CSV 較新時重建）
+    - CSV 由 Polars 多執行緒解析後轉成 pandas（下游訊號與統計沿用 pandas 欄位操作）
+    - 價量欄位降為 float32：價格最多 8 位有效數字，記憶體與傳給子行程的資料量減半
+    - 指標核心仍以 float64 計算（to_numpy(dtype=np.float64) 為精確轉換）
+    """
+    path_parquet = os.path.splitext(path_csv)[0] + '.parquet'
+    cached = os.path.exists(path_parquet) and os.path.getmtime(path_parquet) >= os.path.getmtime(path_csv)
+    if cached:
+        df = pd.read_parquet(path_parquet)
+    else:
+        df = pl.read_csv(path_csv, try_parse_dates=True).to_pandas()
+
+    df[OHLCV_COLUMNS] = df[OHLCV_COLUMNS].astype(np.float32)  # 舊的 float64 快取同樣降轉
+    if not cached:
+        df.to_parquet(path_parquet, compression='snappy', index=False)
+    return df
+
+
+# ==================== 指標欄位 ====================
+
+def add_sfp_indicators(df):
+    """寫入 Hybrid SFP 所需的指標欄位（原地修改並回傳同一個 df）"""
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+
+    # 與實盤 HybridSFPStrategy 共用 Numba 指標核心
+    df['ema_200'] = ema200(close)
+    df['rsi'] = rsi14(close)
+    df['atr'] = atr14(high, low, close)
+    df['adx'] = adx14(high, low, close)
+
+    bb_lower, _, bb_upper, bw = bb20(close)
+    df['bb_upper'] = bb_upper
+    df['bb_lower'] = bb_lower
+    df['bw'] = bw
+
+    # 高低點直接取自價格，沿用價格欄位的 dtype 無損（本地數據為 float32，欄位記憶體減半）
+    swing_high, swing_low = swing50(high, low)  # 前 50 根高低點，一次遍歷
+    df['swing_high'] = swing_high.astype(df['high'].dtype)
+    df['swing_low'] = swing_low.astype(df['low'].dtype)
+
+    return df
+
+
+def add_sweep_levels(df):
+    """
+    寫入 Silver Bullet 所需的欄位（原地修改並回傳同一個 df）
+    - EMA 200 已由 add_sfp_indicators 算過時直接沿用
+    """
+    if 'ema_200' not in df.columns:
+        df['ema_200'] = ema200(df['close'].to_numpy(dtype=np.float64))
+
+    # 前 4 根 15m（1 小時）的高低點：整段序列只算一次；沿用價格 dtype（無損）
+    df['lh_low'] = _prior_window(df['low'].to_numpy(), 4, np.min)
+    df['lh_high'] = _prior_window(df['high'].to_numpy(), 4, np.max)
+
+    return df
+
+
+def _prior_window(values, window, reducer):
+    """
+    第 i 根的值為 values[i-window:i] 的 reducer 結果（不含當根，前 window 根為 NaN）
+    等同 rolling(window).min/max().shift(1)；sliding_window_view 只建立視圖，一次 C 層歸約
+    """
+    out = np.full(values.shape[0], np.nan, dtype=values.dtype)
+    if values.shape[0] > window:
+        out[window:] = reducer(sliding_window_view(values[:-1], window), axis=1)
+    return out
+
+
+# ==================== 指標快取 ====================
+
+# 指標週期（與平滑方式）寫進快取檔名：調整任一週期或公式時自動改用新檔，不會讀到舊結果
+INDICATOR_CACHE_TAG = 'ema200_rma_rsi14_atr14_adx14_bb20_swing50_lh4'
+
+
+def load_with_indicators(path_csv):
+    """
+    載入 OHLCV 並附上 add_sfp_indicators + add_sweep_levels 的全部欄位
+    - 結果另存 <檔名>.indicators_<週期>.parquet，之後直接讀取（CSV 較新時重算）
+    - 只適用於完整區間：抽樣區間的 EMA / RSI 種子隨起點改變，需在切片上重算
+    """
+    path_parquet = f"{os.path.splitext(path_csv)[0]}.indicators_{INDICATOR_CACHE_TAG}.parquet"
+    if os.path.exists(path_parquet) and os.path.getmtime(path_parquet) >= os.path.getmtime(path_csv):
+        return pd.read_parquet(path_parquet)
+
+    df = load_ohlcv(path_csv)
+    add_sfp_indicators(df)
+    add_sweep_levels(df)
+    df.to_parquet(path_parquet, compression='snappy', index=False)
+    return df
+
+
+# ==================== 進場訊號 ====================
+
+def silver_bullet_entries(df):
+    """
+    Silver Bullet 進場（15m，需先 add_sweep_levels）
+    - 時段限制：2-5am, 10-11am UTC；每 4 根 15m（1 小時）判斷一次
+    - 盈虧比 1:2.5
+
+    Returns:
+        (entry_idx, signal, sl, tp)：entry_idx 為訊號的下一根 K 線，signal 為 +1 (LONG) / -1 (SHORT)
+    """
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    ema_200 = df['ema_200'].to_numpy(dtype=np.float64)
+    lh_low = df['lh_low'].to_numpy(dtype=np.float64)
+    lh_high = df['lh_high'].to_numpy(dtype=np.float64)
+
+    # 時段限制（UTC）：每 4 根 15m（1 小時）取一根，只保留時段內的 K 線
+    idx = np.arange(210, len(df), 4)
+    hour = df['timestamp'].dt.hour.to_numpy()[idx]
+    idx = idx[((hour >= 2) & (hour < 5)) | ((hour >= 10) & (hour < 11))]
+
+    h, l, c, ema = high[idx], low[idx], close[idx], ema_200[idx]
+
+    # 掃蕩形態 + EMA 趨勢過濾，整批比較；NaN（暖機期）比較結果為 False
+    # 收盤價不可能同時高於與低於 EMA，多空條件互斥
+    is_long = (l < lh_low[idx]) & (c > lh_low[idx]) & (c > ema)
+    is_short = (h > lh_high[idx]) & (c < lh_high[idx]) & (c < ema)
+
+    signal = np.where(is_short, -1, np.where(is_long, 1, 0))
+    sl = np.where(is_short, h, l)
+    risk_dist = np.abs(c - sl)
+    keep = (signal != 0) & (risk_dist != 0)
+
+    # 盈虧比 1:2.5；從訊號的下一根開始檢查出場
+    signal, sl, risk_dist, c = signal[keep], sl[keep], risk_dist[keep], c[keep]
+    tp = c + signal * risk_dist * 2.5
+    return idx[keep] + 1, signal.astype(np.int64), sl, tp
+
+
+def hybrid_sfp_signals(df):
+    """
+    以 NumPy 遮罩一次算出每根 K 線收盤後的進場訊號（SFP 優先，Trend 其次；需先 add_sfp_indicators）
+
+    Returns:
+        (signal, sl, tp, is_sfp)：signal 為 +1 (LONG) / -1 (SHORT) / 0，
+        止損距離為 0 的訊號已濾除
+    """
+    high = df['high'].to_numpy(dtype=np.float64)
+    low = df['low'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    rsi = df['rsi'].to_numpy(dtype=np.float64)
+    adx = df['adx'].to_numpy(dtype=np.float64)
+    atr = df['atr'].to_numpy(dtype=np.float64)
+    ema_200 = df['ema_200'].to_numpy(dtype=np.float64)
+    swing_high = df['swing_high'].to_numpy(dtype=np.float64)
+    swing_low = df['swing_low'].to_numpy(dtype=np.float64)
+    bb_upper = df['bb_upper'].to_numpy(dtype=np.float64)
+    bb_lower = df['bb_lower'].to_numpy(dtype=np.float64)
+    bw = df['bw'].to_numpy(dtype=np.float64)
+
+    # NaN 比較一律為 False，與逐列判斷一致
+    valid = ~np.isnan(adx) & ~np.isnan(rsi)
+
+    # SFP（ADX > 30, RSI 60/40）：掃高點優先，掃高點成立但 RSI 不符時不再看掃低點
+    sweep_high = (adx > 30) & (high > swing_high) & (close < swing_high)
+    sfp_short = sweep_high & (rsi > 60)
+    sfp_long = (adx > 30) & ~sweep_high & (low < swing_low) & (close > swing_low) & (rsi < 40)
+
+    # Trend Breakout（ADX > 25）
+    bw_min = 5.0
+    trend = (adx > 25) & ~np.isnan(bb_upper) & (bw > bw_min)
+    trend_long = trend & (close > bb_upper) & (close > ema_200)
+    trend_short = trend & ~trend_long & (close < bb_lower) & (close < ema_200)
+
+    is_sfp = valid & (sfp_short | sfp_long)
+    is_trend = valid & ~is_sfp & (trend_long | trend_short)
+
+    signal = np.where(is_sfp, np.where(sfp_short, -1, 1), np.where(is_trend, np.where(trend_long, 1, -1), 0))
+    sl = np.where(
+        is_sfp,
+        np.where(sfp_short, high, low),
+        np.where(trend_long, close - 2 * atr, close + 2 * atr)
+    )
+
+    # 盈虧比 1:2.5
+    risk_dist = np.abs(close - sl)
+    tp = close + signal * risk_dist * 2.5
+    signal[risk_dist == 0] = 0
+
+    return signal, sl, tp, is_sfp
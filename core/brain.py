@@ -3,8 +3,10 @@ import google.generativeai as genai
 import json
 import os
 import asyncio
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
+
+from core.indicator_kernels import ema200, rsi14, atr14
 
 class TradingBrain:
     def __init__(self):
@@ -111,9 +113,13 @@ class TradingBrain:
         """
         # 1. 計算技術指標 (使用 try-except 保護)
         try:
-            df['rsi'] = ta.rsi(df['close'], length=14)
-            df['ema200'] = ta.ema(df['close'], length=200)
-            df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=14)
+            # Numba 指標核心（與 pandas_ta 同公式），EMA 200 / ATR 不再走 pandas_ta 的慢速路徑
+            high = df['high'].to_numpy(dtype=np.float64)
+            low = df['low'].to_numpy(dtype=np.float64)
+            close = df['close'].to_numpy(dtype=np.float64)
+            df['rsi'] = rsi14(close)
+            df['ema200'] = ema200(close)
+            df['atr'] = atr14(high, low, close)
         except Exception as e:
             print(f"⚠️ 指標計算部分失敗: {e}")
 
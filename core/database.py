@@ -8,6 +8,7 @@ import sqlite3
 import json
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
+import numpy as np
 import pandas as pd
 
 class TradingDatabase:
@@ -192,8 +193,8 @@ class TradingDatabase:
         
         return [dict(row) for row in rows]
     
-    def get_trades_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
-        """獲取指定日期範圍的交易"""
+    def get_trades_by_date_range(self, start_date: str, end_date: str, limit: Optional[int] = None) -> List[Dict]:
+        """獲取指定日期範圍的交易（limit 為 None 時不限筆數）"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -201,13 +202,29 @@ class TradingDatabase:
             SELECT * FROM trades 
             WHERE DATE(timestamp) BETWEEN ? AND ?
             ORDER BY timestamp DESC
-        ''', (start_date, end_date))
+            LIMIT ?
+        ''', (start_date, end_date, -1 if limit is None else limit))
         
         rows = cursor.fetchall()
         conn.close()
         
         return [dict(row) for row in rows]
     
+    def get_trades_pnl_by_date_range(self, start_date: str, end_date: str) -> np.ndarray:
+        """只取指定日期範圍的 pnl 欄位（未平倉為 NaN），供統計使用"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+            SELECT pnl FROM trades 
+            WHERE DATE(timestamp) BETWEEN ? AND ?
+        ''', (start_date, end_date))
+        
+        rows = cursor.fetchall()
+        conn.close()
+        
+        return np.array([np.nan if row[0] is None else row[0] for row in rows], dtype=np.float64)
+    
     def get_recent_trades(self, limit: int = 50) -> List[Dict]:
         """獲取最近的交易記錄"""
         conn = self.get_connection()
@@ -1,6 +1,7 @@
 # core/execution.py
 import ccxt.async_support as ccxt
 import json
+import orjson
 import os
 import time
 import pandas as pd
@@ -10,6 +11,11 @@ from datetime import datetime
 from core.persistence import StateManager
 from core.risk_manager import RiskManager
 
+# 倉位方向 -> 正負號（JSON 仍存字串，監控迴圈內只做整數運算）
+# place_order 收到的是下單方向 buy / sell，存檔時轉大寫，與 LONG / SHORT 視為同義
+LONG, SHORT = 1, -1
+SIDE_SIGN = {'LONG': LONG, 'BUY': LONG, 'SHORT': SHORT, 'SELL': SHORT}
+
 def retry_async(retries=3, delay=1, backoff=2):
     """
     非同步重試裝飾器 (Exponential Backoff)
@@ -47,6 +53,8 @@ class ExecutionSystem:
         self.exchange = None
         self.market_symbol = None
         self.state_manager = StateManager(file_path="data/paper_trades.json") # 專門存模擬交易
+        # 已平倉紀錄只追加寫入 JSONL，paper_trades.json 只保存小型狀態，避免每次存檔重寫整段歷史
+        self.history_path = os.path.splitext(self.state_manager.file_path)[0] + "_history.jsonl"
         self.paper_trades = self._load_paper_trades()
         self.max_daily_loss_pct = 0.20 # 20% 熔斷機制 (基於 2024 回測極端值 16%)
         self._init_exchange() # 初始化放在這裡
@@ -65,15 +73,49 @@ class ExecutionSystem:
         }
         
         if not data:
-            return defaults
+            data = {}
             
         # 補齊可能缺失的欄位 (例如檔案是被 Persistence 錯誤初始化的)
         for k, v in defaults.items():
             if k not in data:
                 data[k] = v
-                
+        
+        # 舊版格式：歷史存在 JSON 內，一次性搬到 JSONL
+        legacy_history = data.pop("history", [])
+        if legacy_history:
+            for trade in legacy_history:
+                self._append_history(trade)
+            self.state_manager.save_state(data)
+        
+        data["history"] = self._load_history()
         return data
     
+    def _load_history(self):
+        """逐行讀取已平倉紀錄"""
+        history = []
+        try:
+            with open(self.history_path, 'rb') as f:
+                for line in f:
+                    if line.strip():
+                        history.append(orjson.loads(line))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"⚠️ 讀取模擬交易歷史失敗: {e}")
+        return history
+    
+    def _append_history(self, trade):
+        """追加一筆已平倉紀錄 (O(1)，不重寫舊資料)"""
+        with open(self.history_path, 'ab') as f:
+            # NumPy 數值 (pnl / 價格) 原樣輸出為數字；其他無法序列化的值 (例如時間) 才轉為字串
+            f.write(orjson.dumps(trade, default=str, option=orjson.OPT_SERIALIZE_NUMPY) + b"\n")
+            f.flush()
+            os.fsync(f.fileno())
+    
+    def _save_paper_trades(self):
+        """保存模擬交易狀態 (不含歷史)"""
+        self.state_manager.save_state({k: v for k, v in self.paper_trades.items() if k != "history"})
+    
     def _init_exchange(self):
         """初始化交易所連線"""
         base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -309,7 +351,7 @@ class ExecutionSystem:
         
         # 3. 存入 JSON
         self.paper_trades["active_positions"].append(position)
-        self.state_manager.save_state(self.paper_trades)
+        self._save_paper_trades()
         print(f"   ✅ 模擬單已記錄 (ID: {position['id']}) @ {entry_price}")
 
     async def monitor_positions(self):
@@ -336,30 +378,20 @@ class ExecutionSystem:
                 updated_positions.append(pos)
                 continue
 
-            # 檢查出場條件
+            # 檢查出場條件：乘上方向正負號後，LONG / SHORT 共用同一組比較
+            # SL：價格朝不利方向觸及止損；TP：價格朝有利方向觸及止盈
             exit_reason = None
-            pnl = 0.0
-            
-            # LONG: SL (低於止損), TP (高於止盈)
-            if pos['side'] == 'LONG':
-                if pos['stop_loss'] and curr_price <= pos['stop_loss']:
-                    exit_reason = "SL"
-                elif pos['take_profit'] and curr_price >= pos['take_profit']:
-                    exit_reason = "TP"
+            side = SIDE_SIGN.get(pos['side'], 0)
             
-            # SHORT: SL (高於止損), TP (低於止盈)
-            elif pos['side'] == 'SHORT':
-                if pos['stop_loss'] and curr_price >= pos['stop_loss']:
+            if side:
+                if pos['stop_loss'] and side * (curr_price - pos['stop_loss']) <= 0:
                     exit_reason = "SL"
-                elif pos['take_profit'] and curr_price <= pos['take_profit']:
+                elif pos['take_profit'] and side * (curr_price - pos['take_profit']) >= 0:
                     exit_reason = "TP"
 
             if exit_reason:
                 # 執行平倉結算
-                if pos['side'] == 'LONG':
-                    pnl = (curr_price - pos['entry_price']) * pos['amount']
-                else:
-                    pnl = (pos['entry_price'] - curr_price) * pos['amount']
+                pnl = side * (curr_price - pos['entry_price']) * pos['amount']
                 
                 print(f"🚨 [Paper Trade] 觸發 {exit_reason}! {symbol} @ {curr_price}")
                 print(f"   💰 PnL: {pnl:.4f} USDT")
@@ -373,6 +405,7 @@ class ExecutionSystem:
                     "exit_reason": exit_reason,
                     "pnl": pnl
                 })
+                self._append_history(completed_trade)
                 self.paper_trades["history"].append(completed_trade)
                 self.paper_trades["total_pnl"] += pnl
                 history_updated = True
@@ -382,7 +415,7 @@ class ExecutionSystem:
         # 如果有變動，存檔
         if history_updated:
             self.paper_trades["active_positions"] = updated_positions
-            self.state_manager.save_state(self.paper_trades)
+            self._save_paper_trades()
             print(f"📊 目前模擬總損益: {self.paper_trades['total_pnl']:.4f} USDT")
 
     async def close_session(self):
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# core/indicator_kernels.py
+"""
+固定週期的 Numba 指標核心
+- 週期在產生核心時以閉包常數固定，編譯期即知道迴圈次數，LLVM 可展開/向量化
+- 每個 (指標, 週期) 只產生一次，並以 cache=True 寫入磁碟快取
+- 公式與 pandas_ta 相同：EMA 以 SMA 為種子；RSI / ATR / ADX 的平滑為 RMA（ewm adjust=True），非 TA-Lib 的 SMA 種子
+"""
+
+import numpy as np
+from numba import njit
+
+
+# ==================== 核心產生器 ====================
+
+def _make_ema(length: int):
+    alpha = 2.0 / (length + 1)
+
+    @njit(cache=True)
+    def ema(close):
+        n = close.shape[0]
+        out = np.full(n, np.nan)
+        if n < length:
+            return out
+
+        # 以前 length 根 SMA 為種子（與 pandas_ta.ema 一致）
+        total = 0.0
+        for i in range(length):
+            total += close[i]
+        value = total / length
+        out[length - 1] = value
+
+        for i in range(length, n):
+            value += alpha * (close[i] - value)
+            out[i] = value
+        return out
+
+    return ema
+
+
+def _make_rsi(length: int):
+    decay = 1.0 - 1.0 / length
+
+    @njit(cache=True)
+    def rsi(close):
+        n = close.shape[0]
+        out = np.full(n, np.nan)
+
+        # pandas_ta 的 RMA：ewm(alpha=1/length, adjust=True, min_periods=length)
+        # 漲跌幅以同一組權重加權，權重和在 gain / (gain + loss) 中可約去，只需累加分子
+        gain = 0.0
+        loss = 0.0
+        for i in range(1, n):
+            diff = close[i] - close[i - 1]
+            gain = decay * gain + (diff if diff > 0 else 0.0)
+            loss = decay * loss + (-diff if diff < 0 else 0.0)
+            if i >= length:
+                total = gain + loss
+                out[i] = 100.0 * gain / total if total > 0 else np.nan
+        return out
+
+    return rsi
+
+
+def _make_atr(length: int):
+    decay = 1.0 - 1.0 / length
+
+    @njit(cache=True)
+    def atr(high, low, close):
+        n = close.shape[0]
+        out = np.full(n, np.nan)
+
+        # 首根沒有前收盤，真實波幅從第 2 根起算（與 pandas_ta.true_range 一致）
+        # RMA（adjust=True）：加權和 / 權重和，第 length 個真實波幅起有值
+        num = 0.0
+        den = 0.0
+        for i in range(1, n):
+            tr = max(high[i] - low[i], abs(high[i] - close[i - 1]), abs(low[i] - close[i - 1]))
+            num = decay * num + tr
+            den = decay * den + 1.0
+            if i >= length:
+                out[i] = num / den
+        return out
+
+    return atr
+
+
+def _make_adx(length: int):
+    decay = 1.0 - 1.0 / length
+
+    @njit(cache=True)
+    def adx(high, low, close):
+        n = close.shape[0]
+        out = np.full(n, np.nan)
+        if n < 2 * length:
+            return out
+
+        # +DM / -DM 以 RMA 平滑；DI 的 100 / ATR 與 RMA 權重和在 DX 中約去，只需累加分子
+        plus_s = 0.0
+        minus_s = 0.0
+        dx_num = 0.0
+        dx_den = 0.0
+        dx_count = 0
+        for i in range(1, n):
+            up = high[i] - high[i - 1]
+            down = low[i - 1] - low[i]
+            plus_s = decay * plus_s + (up if (up > down and up > 0) else 0.0)
+            minus_s = decay * minus_s + (down if (down > up and down > 0) else 0.0)
+            if i < length:
+                continue
+
+            # ADX = DX 的 RMA；DX 無定義（+DM、-DM 皆為 0）時與 pandas 相同，權重照常衰減但不計入
+            dx_num *= decay
+            dx_den *= decay
+            total = plus_s + minus_s
+            if total > 0:
+                dx_num += 100.0 * abs(plus_s - minus_s) / total
+                dx_den += 1.0
+                dx_count += 1
+            if dx_count >= length:
+                out[i] = dx_num / dx_den
+        return out
+
+    return adx
+
+
+def _make_bbands(length: int, std: float = 2.0):
+    @njit(cache=True)
+    def bbands(close):
+        """回傳 (lower, middle, upper, bandwidth)，標準差 ddof=0（與 pandas_ta 一致）"""
+        n = close.shape[0]
+        lower = np.full(n, np.nan)
+        middle = np.full(n, np.nan)
+        upper = np.full(n, np.nan)
+        bandwidth = np.full(n, np.nan)
+
+        for i in range(length - 1, n):
+            mean = 0.0
+            for j in range(i - length + 1, i + 1):
+                mean += close[j]
+            mean /= length
+
+            var = 0.0
+            for j in range(i - length + 1, i + 1):
+                d = close[j] - mean
+                var += d * d
+            dev = std * np.sqrt(var / length)
+
+            lower[i] = mean - dev
+            middle[i] = mean
+            upper[i] = mean + dev
+            bandwidth[i] = (upper[i] - lower[i]) / mean * 100.0 if mean != 0 else np.nan
+        return lower, middle, upper, bandwidth
+
+    return bbands
+
+
+def _make_swing(length: int):
+    @njit(cache=True)
+    def swing(high, low):
+        """
+        回傳 (swing_high, swing_low)：前 length 根（不含當根）的最高 / 最低價
+        等同 rolling(length).max().shift(1) / rolling(length).min().shift(1)，高低點在同一次遍歷完成
+        """
+        n = high.shape[0]
+        swing_high = np.full(n, np.nan)
+        swing_low = np.full(n, np.nan)
+
+        for i in range(length, n):
+            hi = high[i - length]
+            lo = low[i - length]
+            for j in range(i - length + 1, i):
+                if high[j] > hi:
+                    hi = high[j]
+                if low[j] < lo:
+                    lo = low[j]
+            swing_high[i] = hi
+            swing_low[i] = lo
+        return swing_high, swing_low
+
+    return swing
+
+
+_FACTORIES = {
+    'ema': _make_ema,
+    'rsi': _make_rsi,
+    'atr': _make_atr,
+    'adx': _make_adx,
+    'bbands': _make_bbands,
+    'swing': _make_swing,
+}
+
+_KERNELS = {}
+
+
+def make_kernel(name: str, length: int):
+    """
+    取得指定週期的專用核心（每個週期只產生一次）
+
+    Args:
+        name: 'ema' / 'rsi' / 'atr' / 'adx' / 'bbands' / 'swing'
+        length: 指標週期
+
+    Returns:
+        已套用 @njit 的指標函數
+    """
+    key = (name, length)
+    kernel = _KERNELS.get(key)
+    if kernel is None:
+        kernel = _FACTORIES[name](length)
+        _KERNELS[key] = kernel
+    return kernel
+
+
+# ==================== 常用週期 ====================
+
+ema200 = make_kernel('ema', 200)
+rsi14 = make_kernel('rsi', 14)
+atr14 = make_kernel('atr', 14)
+adx14 = make_kernel('adx', 14)
+bb20 = make_kernel('bbands', 20)
+bb50 = make_kernel('bbands', 50)
+swing50 = make_kernel('swing', 50)
@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+# core/indicators_fast.py
+"""
+輕量技術指標（純 NumPy）
+策略只需要最新一根的指標值時，避免 pandas_ta 對整段序列重算
+（整段序列的 ATR 等指標請用 core.indicator_kernels，與 pandas_ta 同公式）
+"""
+
+import numpy as np
+
+
+def ema_last(x: np.ndarray, length: int) -> float:
+    """
+    EMA 最新值（以前 length 根 SMA 為種子，與 pandas_ta.ema 一致）
+
+    Args:
+        x: 價格序列
+        length: EMA 週期
+
+    Returns:
+        最新 EMA 值；資料不足時回傳 NaN
+    """
+    x = np.asarray(x, dtype=np.float64)
+    if x.size < length:
+        return float('nan')
+
+    alpha = 2.0 / (length + 1)
+    seed = x[:length].mean()
+    tail = x[length:]
+
+    # 遞迴式 ema[t] = ema[t-1] + alpha * (x[t] - ema[t-1]) 的展開形式，一次點積完成
+    decay = (1.0 - alpha) ** np.arange(tail.size - 1, -1, -1)
+    return float((1.0 - alpha) ** tail.size * seed + alpha * np.dot(decay, tail))
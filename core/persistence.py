@@ -2,6 +2,7 @@
 import json
 import os
 import logging
+import orjson
 
 # 設定日誌
 logging.basicConfig(level=logging.INFO)
@@ -45,8 +46,13 @@ class StateManager:
     def load_state(self):
         """讀取狀態"""
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(self.file_path, 'rb') as f:
+                data = f.read()
+            try:
+                return orjson.loads(data)
+            except orjson.JSONDecodeError:
+                # orjson 不接受 NaN / Infinity；舊版以 json 模組寫入的檔案可能含有，改用 json 解析
+                return json.loads(data)
         except Exception as e:
             logger.error(f"❌ 讀取狀態失敗: {e}")
             return {}
@@ -56,8 +62,9 @@ class StateManager:
         temp_path = self.file_path + ".tmp"
         try:
             # 1. 先寫入暫存檔
-            with open(temp_path, 'w', encoding='utf-8') as f:
-                json.dump(state, f, indent=4, ensure_ascii=False)
+            # orjson 直接輸出 UTF-8 bytes；無法原生序列化的值 (例如 pd.Timestamp) 轉為字串
+            with open(temp_path, 'wb') as f:
+                f.write(orjson.dumps(state, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
                 # 確保數據真正寫入硬碟 (防止斷電數據遺失)
                 f.flush()
                 os.fsync(f.fileno())
@@ -7,7 +7,12 @@ AI 驅動的績效報告生成器
 
 import os
 import sys
+import json
+import asyncio
+import time
+import hashlib
 from datetime import datetime, timedelta
+import numpy as np
 import pandas as pd
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -23,8 +28,12 @@ except:
 class AIPerformanceReporter:
     """AI 績效報告生成器"""
     
+    AI_CACHE_PATH = 'data/ai_cache.json'
+    AI_CACHE_TTL = 24 * 3600  # 相同數據 24 小時內不重複呼叫 Gemini
+    
     def __init__(self):
         self.ai_enabled = False
+        self._ai_cache = self._load_ai_cache()
         
         if GEMINI_AVAILABLE:
             api_key = os.getenv('GEMINI_API_KEY', '')
@@ -33,24 +42,23 @@ class AIPerformanceReporter:
                 self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
                 self.ai_enabled = True
     
-    def generate_daily_report(self) -> str:
+    async def generate_daily_report(self) -> str:
         """生成每日績效報告"""
         # 獲取今日數據
         today = datetime.now().date()
-        trades = db.get_trades_by_date_range(str(today), str(today))
+        # 統計只需要 pnl 欄位，直接由資料庫取成陣列
+        pnls = db.get_trades_pnl_by_date_range(str(today), str(today))
         
-        if not trades:
+        if pnls.size == 0:
             return "📊 今日暫無交易"
         
-        df = pd.DataFrame(trades)
-        
         # 基礎統計
         stats = {
-            'total_trades': len(df),
-            'wins': len(df[df['pnl'] > 0]) if 'pnl' in df.columns else 0,
-            'losses': len(df[df['pnl'] < 0]) if 'pnl' in df.columns else 0,
-            'total_pnl': df['pnl'].sum() if 'pnl' in df.columns else 0,
-            'win_rate': len(df[df['pnl'] > 0]) / len(df) * 100 if 'pnl' in df.columns and len(df) > 0 else 0
+            'total_trades': pnls.size,
+            'wins': int((pnls > 0).sum()),
+            'losses': int((pnls < 0).sum()),
+            'total_pnl': float(np.nansum(pnls)),
+            'win_rate': (pnls > 0).sum() / pnls.size * 100
         }
         
         # 生成報告
@@ -65,33 +73,33 @@ class AIPerformanceReporter:
 - 總盈虧：${stats['total_pnl']:.2f}
 """
         
-        # 如果有 AI，加入分析
-        if self.ai_enabled and len(df) > 0:
-            ai_insight = self._get_ai_insight(df, stats, period='daily')
+        # 如果有 AI，加入分析（只需前 5 筆明細）
+        if self.ai_enabled:
+            recent = db.get_trades_by_date_range(str(today), str(today), limit=5)
+            ai_insight = await self._get_ai_insight(pd.DataFrame(recent), stats, period='daily')
             report += f"\n🤖 AI 分析：\n{ai_insight}\n"
         
         return report
     
-    def generate_weekly_report(self) -> str:
+    async def generate_weekly_report(self) -> str:
         """生成每週績效報告"""
         # 獲取過去 7 天數據
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=7)
         
-        trades = db.get_trades_by_date_range(str(start_date), str(end_date))
+        pnls = db.get_trades_pnl_by_date_range(str(start_date), str(end_date))
         
-        if not trades:
+        if pnls.size == 0:
             return "📊 本週暫無交易"
         
-        df = pd.DataFrame(trades)
-        
         # 基礎統計
+        valid = ~np.isnan(pnls)
         stats = {
-            'total_trades': len(df),
-            'wins': len(df[df['pnl'] > 0]) if 'pnl' in df.columns else 0,
-            'total_pnl': df['pnl'].sum() if 'pnl' in df.columns else 0,
-            'win_rate': len(df[df['pnl'] > 0]) / len(df) * 100 if 'pnl' in df.columns and len(df) > 0 else 0,
-            'avg_pnl': df['pnl'].mean() if 'pnl' in df.columns else 0
+            'total_trades': pnls.size,
+            'wins': int((pnls > 0).sum()),
+            'total_pnl': float(np.nansum(pnls)),
+            'win_rate': (pnls > 0).sum() / pnls.size * 100,
+            'avg_pnl': float(pnls[valid].mean()) if valid.any() else 0
         }
         
         report = f"""
@@ -105,13 +113,14 @@ class AIPerformanceReporter:
 """
         
         # AI 分析
-        if self.ai_enabled and len(df) > 0:
-            ai_insight = self._get_ai_insight(df, stats, period='weekly')
+        if self.ai_enabled:
+            recent = db.get_trades_by_date_range(str(start_date), str(end_date), limit=5)
+            ai_insight = await self._get_ai_insight(pd.DataFrame(recent), stats, period='weekly')
             report += f"\n🤖 AI 分析與建議：\n{ai_insight}\n"
         
         return report
     
-    def _get_ai_insight(self, df, stats, period='daily'):
+    async def _get_ai_insight(self, df, stats, period='daily'):
         """使用 AI 生成洞察"""
         if not self.ai_enabled:
             return "（AI 功能未啟用）"
@@ -142,14 +151,45 @@ class AIPerformanceReporter:
 請用繁體中文，保持簡潔（200字內）。
 """
         
+        # 相同統計數據直接使用快取回應
+        key = hashlib.blake2b(data_summary.encode('utf-8'), digest_size=16).hexdigest()
+        cached = self._ai_cache.get(key)
+        if cached and time.time() - cached['ts'] < self.AI_CACHE_TTL:
+            return cached['text']
+        
         try:
-            response = self.model.generate_content(prompt)
-            return response.text
+            # Gemini 呼叫需數秒，不可阻塞事件循環（通知器等協程需繼續運作）
+            response = await self.model.generate_content_async(prompt)
+            text = response.text  # 回應被封鎖或無候選內容時會拋出 ValueError
         except Exception as e:
             return f"（AI 分析失敗：{e}）"
+        
+        self._ai_cache[key] = {'ts': time.time(), 'text': text}
+        self._save_ai_cache()
+        return text
+    
+    def _load_ai_cache(self) -> dict:
+        """載入 AI 回應快取（丟棄已過期項目）"""
+        try:
+            with open(self.AI_CACHE_PATH, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        
+        now = time.time()
+        return {k: v for k, v in cache.items() if now - v.get('ts', 0) < self.AI_CACHE_TTL}
+    
+    def _save_ai_cache(self):
+        """保存 AI 回應快取"""
+        try:
+            os.makedirs(os.path.dirname(self.AI_CACHE_PATH), exist_ok=True)
+            with open(self.AI_CACHE_PATH, 'w', encoding='utf-8') as f:
+                json.dump(self._ai_cache, f, ensure_ascii=False)
+        except OSError as e:
+            print(f"⚠️ AI 快取保存失敗: {e}")
 
 
-def main():
+async def main():
     reporter = AIPerformanceReporter()
     
     print("=" * 70)
@@ -160,10 +200,14 @@ def main():
         print("\n⚠️  AI 功能未啟用")
         print("   設置環境變量 GEMINI_API_KEY 以啟用 AI 分析")
     
-    print("\n" + reporter.generate_daily_report())
+    daily, weekly = await asyncio.gather(
+        reporter.generate_daily_report(),
+        reporter.generate_weekly_report()
+    )
+    print("\n" + daily)
     print("\n" + "=" * 70)
-    print("\n" + reporter.generate_weekly_report())
+    print("\n" + weekly)
 
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -9,14 +9,19 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import json
 import os
+import sys
+from pathlib import Path
 from datetime import datetime
-import pandas_ta as ta
 import vectorbt as vbt
 
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from core.indicator_kernels import ema200
+
 # 頁面配置
 st.set_page_config(
     page_title="交易系統統一儀表板",
@@ -32,22 +37,37 @@ def load_paper_trades():
     """載入模擬交易紀錄"""
     try:
         with open('data/paper_trades.json', 'r') as f:
-            return json.load(f)
+            data = json.load(f)
     except:
         return {"initial_balance": 1000.0, "active_positions": [], "history": [], "total_pnl": 0.0}
+    
+    # 已平倉紀錄另存於 JSONL（每行一筆）
+    history = data.get('history', [])
+    try:
+        with open('data/paper_trades_history.jsonl', 'r') as f:
+            history = history + [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        pass
+    data['history'] = history
+    return data
+
+# 策略 -> 回測數據文件（兩個策略目前共用同一份 15m 數據）
+BACKTEST_DATA_FILES = {
+    "Silver Bullet": 'data/backtest/BTC_USDT_15m_2023-2024.csv',
+    "Hybrid SFP": 'data/backtest/BTC_USDT_15m_2023-2024.csv',
+}
 
 @st.cache_data(ttl=60)
+def _load_ohlcv_csv(path):
+    """讀取並解析 OHLCV CSV；以文件路徑為快取鍵，共用同一文件的策略只讀一次"""
+    df = pd.read_csv(path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'])
+    return df
+
 def load_backtest_data(strategy_name):
     """載入回測數據（從 CSV）"""
     try:
-        # 根據策略名稱對應文件
-        if strategy_name == "Silver Bullet":
-            df = pd.read_csv('data/backtest/BTC_USDT_15m_2023-2024.csv')
-        else:  # Hybrid SFP
-            df = pd.read_csv('data/backtest/BTC_USDT_15m_2023-2024.csv')
-        
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
+        return _load_ohlcv_csv(BACKTEST_DATA_FILES.get(strategy_name, BACKTEST_DATA_FILES["Hybrid SFP"]))
     except Exception as e:
         st.error(f"無法載入回測數據: {e}")
         return None
@@ -73,7 +93,7 @@ def plot_chart_with_trades(df, trades, strategy_name):
     """繪製帶交易標記的K線圖"""
     
     # 計算技術指標
-    df['ema_200'] = ta.ema(df['close'], length=200)
+    df['ema_200'] = ema200(df['close'].to_numpy(dtype=np.float64))
     
     if strategy_name == "Silver Bullet":
         # 15m 時間框架
@@ -88,7 +108,7 @@ def plot_chart_with_trades(df, trades, strategy_name):
             'close': 'last',
             'volume': 'sum'
         }).dropna().reset_index()
-        df['ema_200'] = ta.ema(df['close'], length=200)
+        df['ema_200'] = ema200(df['close'].to_numpy(dtype=np.float64))
         timeframe_label = "4小時"
     
     # 創建圖表
@@ -263,16 +283,17 @@ def show_bot_status():
     st.subheader("📈 權益曲線")
     
     if history:
-        df_history = pd.DataFrame(history)
-        df_history['timestamp'] = pd.to_datetime(df_history['exit_time'], unit='s')
-        df_history = df_history.sort_values('timestamp')
-        df_history['cumulative_pnl'] = df_history['pnl'].cumsum()
-        df_history['equity'] = trades_data.get('initial_balance', 1000) + df_history['cumulative_pnl']
+        # 只取平倉時間與損益兩欄成陣列；history 依平倉先後寫入，穩定排序在近乎有序的輸入上接近線性
+        exit_time = np.array([t['exit_time'] for t in history], dtype=np.float64)
+        pnl = np.array([t['pnl'] for t in history], dtype=np.float64)
+        order = np.argsort(exit_time, kind='stable')
+        timestamps = pd.to_datetime(exit_time[order], unit='s')
+        equity = trades_data.get('initial_balance', 1000) + np.cumsum(pnl[order])
         
         fig = go.Figure()
         fig.add_trace(go.Scatter(
-            x=df_history['timestamp'],
-            y=df_history['equity'],
+            x=timestamps,
+            y=equity,
             mode='lines+markers',
             name='權益',
             line=dict(color='#00ff00', width=2),
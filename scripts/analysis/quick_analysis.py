@@ -1,7 +1,13 @@
 #!/usr/bin/env python3
 """快速分析 12/27-12/29 行情"""
+import sys
+from pathlib import Path
+
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from core.indicator_kernels import ema200
 
 # 載入數據
 df = pd.read_csv('temp_btc_recent.csv')
@@ -25,7 +31,7 @@ print(f"  波動幅度: ${target['high'].max() - target['low'].min():.2f}")
 print(f"  波動率: {(target['high'].max() - target['low'].min()) / target['low'].min() * 100:.2f}%")
 
 # 計算 EMA 200
-df['ema_200'] = ta.ema(df['close'], length=200)
+df['ema_200'] = ema200(df['close'].to_numpy(dtype=np.float64))
 
 # 檢查 Silver Bullet 條件
 print("\n" + "=" * 70)
@@ -35,16 +41,15 @@ print("=" * 70)
 signals_found = 0
 near_misses = 0
 
-for i in range(210, len(df)):
+# 前 4 根 15m 的高低點：整段序列只算一次，不再逐根切出小 DataFrame
+df['lh_low'] = df['low'].rolling(window=4).min().shift(1)
+df['lh_high'] = df['high'].rolling(window=4).max().shift(1)
+
+# 只走訪目標期間的 K 線
+for i in target.index[target.index >= 210]:
     row = df.iloc[i]
-    
-    # 只看目標期間
-    if not ('2024-12-27' <= str(row['timestamp']) <= '2024-12-29 23:59'):
-        continue
-    
-    prev_4h = df.iloc[i-4:i]
-    lh_low = prev_4h['low'].min()
-    lh_high = prev_4h['high'].max()
+    lh_low = row['lh_low']
+    lh_high = row['lh_high']
     
     hour = row['timestamp'].hour
     in_session = (2 <= hour < 5) or (10 <= hour < 11)
@@ -17,6 +17,10 @@ WEEKLY_INVESTMENT = 250
 CORE_RATIO = 0.4
 TRADE_FEE = 0.001
 
+# 交易記錄的類型代碼（int8）
+BUY = 1
+SELL = -1
+
 def fetch_data():
     """獲取 2020-2025 數據"""
     print("📥 獲取數據...")
@@ -71,38 +75,30 @@ def calculate_indicators(df):
     return df
 
 def get_buy_multiplier(mvrv, rsi, fg):
-    """計算買入倍數（加權分數）"""
+    """計算買入倍數（加權分數，可直接傳入整段 NumPy 陣列）"""
+    mvrv = np.asarray(mvrv, dtype=np.float64)
+    rsi = np.asarray(rsi, dtype=np.float64)
+    fg = np.asarray(fg, dtype=np.float64)
+    
     # MVRV 分數
-    if mvrv < 0.1:
-        mvrv_score = 0
-    elif mvrv < 1.0:
-        mvrv_score = 10
-    elif mvrv < 3.0:
-        mvrv_score = 30
-    elif mvrv < 5.0:
-        mvrv_score = 50
-    else:
-        mvrv_score = 80
+    mvrv_score = np.select(
+        [mvrv < 0.1, mvrv < 1.0, mvrv < 3.0, mvrv < 5.0],
+        [0, 10, 30, 50],
+        default=80
+    )
     
-    rsi_score = rsi if not pd.isna(rsi) else 50
-    fg_score = fg if not pd.isna(fg) else 50
+    rsi_score = np.where(np.isnan(rsi), 50, rsi)
+    fg_score = np.where(np.isnan(fg), 50, fg)
     
     # 加權
     composite = (mvrv_score * 0.65) + (rsi_score * 0.25) + (fg_score * 0.10)
     
     # 倍數
-    if composite < 15:
-        return 3.5
-    elif composite < 25:
-        return 2.0
-    elif composite < 35:
-        return 1.5
-    elif composite < 50:
-        return 1.0
-    elif composite < 60:
-        return 0.5
-    else:
-        return 0.0
+    return np.select(
+        [composite < 15, composite < 25, composite < 35, composite < 50, composite < 60],
+        [3.5, 2.0, 1.5, 1.0, 0.5],
+        default=0.0
+    )
 
 def backtest():
     """回測"""
@@ -118,50 +114,74 @@ def backtest():
     cash = INITIAL_CAPITAL
     total_invested = INITIAL_CAPITAL
     
-    trades = []
+    # 買入倍數只取決於當天指標，整段一次算完；現金與倉位有路徑依賴，仍逐週模擬
+    multipliers = get_buy_multiplier(df['mvrv'].to_numpy(), df['rsi'].to_numpy(), df['fg'].to_numpy())
+    
+    # 逐週模擬前先把需要的欄位一次轉成陣列，並篩出指標有效的週；迴圈內只剩純量運算
+    dates = df['date'].array  # 取單一元素仍為 Timestamp
+    prices = df['price'].to_numpy(dtype=np.float64)
+    pi_cycle = df['pi_cycle_signal'].to_numpy(dtype=bool)
+    week_idx = np.arange(1400, len(df), 7)  # 從 1400 天後開始（等指標穩定）
+    valid = df['mvrv'].notna().to_numpy() & df['rsi'].notna().to_numpy()
+    week_idx = week_idx[valid[week_idx]]
+    
+    # 交易記錄以欄為單位預先配置（每週最多一買一賣），逐筆寫入索引 n，不再每筆建立 dict
+    n_max = 2 * len(week_idx)
+    trade_bar = np.empty(n_max, dtype=np.int64)
+    trade_type = np.empty(n_max, dtype=np.int8)
+    trade_price = np.empty(n_max)
+    trade_amount = np.empty(n_max)
+    trade_usd = np.empty(n_max)
+    trade_mult = np.empty(n_max)
+    n = 0
     
     # 每週買入
-    for i in range(1400, len(df), 7):  # 從 1400 天後開始（等指標穩定）
-        row = df.iloc[i]
-        
-        if pd.isna(row['mvrv']) or pd.isna(row['rsi']):
-            continue
+    for i in week_idx:
+        price = prices[i]
         
         # 買入
-        multiplier = get_buy_multiplier(row['mvrv'], row['rsi'], row['fg'])
+        multiplier = multipliers[i]
         invest_amount = WEEKLY_INVESTMENT * multiplier
         
         if cash >= invest_amount and invest_amount > 0:
-            btc_bought = (invest_amount * (1 - TRADE_FEE)) / row['price']
+            btc_bought = (invest_amount * (1 - TRADE_FEE)) / price
             core_btc += btc_bought * CORE_RATIO
             trade_btc += btc_bought * (1 - CORE_RATIO)
             cash -= invest_amount
             
-            trades.append({
-                'date': row['date'],
-                'type': 'BUY',
-                'price': row['price'],
-                'amount': btc_bought,
-                'usd': invest_amount,
-                'multiplier': multiplier
-            })
+            trade_bar[n] = i
+            trade_type[n] = BUY
+            trade_price[n] = price
+            trade_amount[n] = btc_bought
+            trade_usd[n] = invest_amount
+            trade_mult[n] = multiplier
+            n += 1
         
         # 賣出（Pi Cycle）
-        if row['pi_cycle_signal'] and trade_btc > 0:
+        if pi_cycle[i] and trade_btc > 0:
             sell_amount = trade_btc
-            sell_value = sell_amount * row['price'] * (1 - TRADE_FEE)
+            sell_value = sell_amount * price * (1 - TRADE_FEE)
             
             cash += sell_value
             trade_btc = 0
             
-            trades.append({
-                'date': row['date'],
-                'type': 'SELL',
-                'price': row['price'],
-                'amount': sell_amount,
-                'usd': sell_value,
-                'multiplier': 0
-            })
+            trade_bar[n] = i
+            trade_type[n] = SELL
+            trade_price[n] = price
+            trade_amount[n] = sell_amount
+            trade_usd[n] = sell_value
+            trade_mult[n] = 0
+            n += 1
+    
+    trade_bar = trade_bar[:n]
+    trade_type = trade_type[:n]
+    trade_price = trade_price[:n]
+    trade_amount = trade_amount[:n]
+    trade_usd = trade_usd[:n]
+    trade_mult = trade_mult[:n]
+    is_buy = trade_type == BUY
+    buy_pos = np.flatnonzero(is_buy)
+    sell_pos = np.flatnonzero(~is_buy)
     
     # 結果
     current_price = df.iloc[-1]['price']
@@ -170,8 +190,8 @@ def backtest():
     total_value = btc_value + cash
     
     # 平均成本
-    total_buy_usd = sum(t['usd'] for t in trades if t['type'] == 'BUY')
-    total_buy_btc = sum(t['amount'] for t in trades if t['type'] == 'BUY')
+    total_buy_usd = trade_usd[is_buy].sum()
+    total_buy_btc = trade_amount[is_buy].sum()
     avg_cost = total_buy_usd / total_buy_btc if total_buy_btc > 0 else 0
     
     # HODL 對比
@@ -205,30 +225,34 @@ def backtest():
     
     # 交易記錄
     print(f"\n{'='*70}")
-    print(f"📋 交易記錄（共 {len(trades)} 筆）")
+    print(f"📋 交易記錄（共 {n} 筆）")
     print(f"{'='*70}\n")
     
-    buy_trades = [t for t in trades if t['type'] == 'BUY']
-    sell_trades = [t for t in trades if t['type'] == 'SELL']
-    
-    print(f"買入：{len(buy_trades)} 筆")
-    print(f"賣出：{len(sell_trades)} 筆")
+    print(f"買入：{len(buy_pos)} 筆")
+    print(f"賣出：{len(sell_pos)} 筆")
     
-    if len(sell_trades) > 0:
+    if len(sell_pos) > 0:
         print(f"\n賣出記錄：")
-        for t in sell_trades:
-            print(f"  {t['date'].date()} | ${t['price']:>7,.0f} | {t['amount']:.6f} BTC → ${t['usd']:>10,.0f}")
+        for k in sell_pos:
+            print(f"  {dates[trade_bar[k]].date()} | ${trade_price[k]:>7,.0f} | {trade_amount[k]:.6f} BTC → ${trade_usd[k]:>10,.0f}")
     else:
         print(f"\n⚠️ 未觸發任何賣出")
     
     # 最後 10 筆買入
     print(f"\n最後 10 筆買入：")
-    for t in buy_trades[-10:]:
-        print(f"  {t['date'].date()} | ${t['price']:>7,.0f} | {t['amount']:.8f} BTC "
-              f"| 倍數 {t['multiplier']:.1f}x | ${t['usd']:>6,.0f}")
-    
-    # 儲存完整記錄
-    df_trades = pd.DataFrame(trades)
+    for k in buy_pos[-10:]:
+        print(f"  {dates[trade_bar[k]].date()} | ${trade_price[k]:>7,.0f} | {trade_amount[k]:.8f} BTC "
+              f"| 倍數 {trade_mult[k]:.1f}x | ${trade_usd[k]:>6,.0f}")
+    
+    # 儲存完整記錄：結束時才一次包成 DataFrame
+    df_trades = pd.DataFrame({
+        'date': df['date'].to_numpy()[trade_bar],
+        'type': np.where(is_buy, 'BUY', 'SELL'),
+        'price': trade_price,
+        'amount': trade_amount,
+        'usd': trade_usd,
+        'multiplier': trade_mult
+    })
     output_file = 'scripts/backtests/reports/current_system_trades.csv'
     df_trades.to_csv(output_file, index=False)
     print(f"\n📄 完整交易記錄已儲存：{output_file}")
@@ -140,32 +140,45 @@ def backtest():
     
     trades = []
     peak_price = 0
+    fired = set()  # 已觸發過的賣出條件（每種只賣一次），取代每週回頭掃描整份 trades
+    
+    # MVRV（200 週均線）與 RSI 只在暖機期為 NaN：迴圈前一次跳過，迴圈內不再逐週檢查
+    valid = (df['mvrv'].notna() & df['rsi'].notna()).to_numpy()
+    first_valid = int(valid.argmax()) if valid.any() else len(df)
+    start = 1400 + -(-max(first_valid - 1400, 0) // 7) * 7  # 對齊每 7 天的取樣點
+    
+    # 逐週模擬只讀 NumPy 純量：迴圈前一次取出欄位，不再每週以 iloc 建立整列 Series
+    dates = df['date'].array  # 取單一元素仍為 Timestamp
+    prices = df['price'].to_numpy(dtype=np.float64)
+    mvrvs = df['mvrv'].to_numpy(dtype=np.float64)
+    rsis = df['rsi'].to_numpy(dtype=np.float64)
+    rsi_monthly = df['rsi_monthly'].to_numpy(dtype=np.float64)
+    fgs = df['fg'].to_numpy(dtype=np.float64)
+    aths = df['ath'].to_numpy(dtype=np.float64)
+    pi_cycle = df['pi_cycle_signal'].to_numpy(dtype=bool)
     
     # 每週買入
-    for i in range(1400, len(df), 7):
-        row = df.iloc[i]
-        
-        if pd.isna(row['mvrv']) or pd.isna(row['rsi']):
-            continue
+    for i in range(start, len(df), 7):
+        price = prices[i]
         
         # 更新峰值
-        if row['price'] > peak_price:
-            peak_price = row['price']
+        if price > peak_price:
+            peak_price = price
         
         # 買入
-        multiplier = get_buy_multiplier(row['mvrv'], row['rsi'], row['fg'], row['price'], row['ath'])
+        multiplier = get_buy_multiplier(mvrvs[i], rsis[i], fgs[i], price, aths[i])
         invest_amount = WEEKLY_INVESTMENT * multiplier
         
         if cash >= invest_amount and invest_amount > 0:
-            btc_bought = (invest_amount * (1 - TRADE_FEE)) / row['price']
+            btc_bought = (invest_amount * (1 - TRADE_FEE)) / price
             core_btc += btc_bought * CORE_RATIO
             trade_btc += btc_bought * (1 - CORE_RATIO)
             cash -= invest_amount
             
             trades.append({
-                'date': row['date'],
+                'date': dates[i],
                 'type': 'BUY',
-                'price': row['price'],
+                'price': price,
                 'amount': btc_bought,
                 'usd': invest_amount,
                 'multiplier': multiplier,
@@ -178,39 +191,42 @@ def backtest():
             sell_pct = 0
             
             # 1. 月線 RSI > 80 → 賣 10%
-            if row['rsi_monthly'] > 80 and not any(t['type'] == 'SELL' and 'RSI >80' in t['reason'] for t in trades):
+            if rsi_monthly[i] > 80 and 'RSI >80' not in fired:
                 sell_pct = 0.10
-                sell_reason = 'RSI >80'
+                sell_key = sell_reason = 'RSI >80'
             
             # 2. 月線 RSI > 85 → 賣 20%
-            elif row['rsi_monthly'] > 85 and not any(t['type'] == 'SELL' and 'RSI >85' in t['reason'] for t in trades):
+            elif rsi_monthly[i] > 85 and 'RSI >85' not in fired:
                 sell_pct = 0.20
-                sell_reason = 'RSI >85'
+                sell_key = sell_reason = 'RSI >85'
             
             # 3. 回調 > 20% → 賣 70%
             elif peak_price > 0:
-                drawdown = (row['price'] - peak_price) / peak_price
-                if drawdown < -0.20 and not any(t['type'] == 'SELL' and '回調 >20%' in t['reason'] for t in trades):
+                drawdown = (price - peak_price) / peak_price
+                if drawdown < -0.20 and '回調 >20%' not in fired:
                     sell_pct = 0.70
+                    sell_key = '回調 >20%'
                     sell_reason = f'回調 >20% (from ${peak_price:,.0f})'
             
             # 4. Pi Cycle（終極）
-            elif row['pi_cycle_signal'] and not any(t['type'] == 'SELL' and 'Pi Cycle' in t['reason'] for t in trades):
+            elif pi_cycle[i] and 'Pi Cycle' not in fired:
                 sell_pct = 1.0
+                sell_key = 'Pi Cycle'
                 sell_reason = 'Pi Cycle Top'
             
             # 執行賣出
             if sell_pct > 0:
                 sell_amount = trade_btc * sell_pct
-                sell_value = sell_amount * row['price'] * (1 - TRADE_FEE)
+                sell_value = sell_amount * price * (1 - TRADE_FEE)
                 
                 cash += sell_value
                 trade_btc -= sell_amount
+                fired.add(sell_key)
                 
                 trades.append({
-                    'date': row['date'],
+                    'date': dates[i],
                     'type': 'SELL',
-                    'price': row['price'],
+                    'price': price,
                     'amount': sell_amount,
                     'usd': sell_value,
                     'multiplier': 0,
@@ -223,9 +239,15 @@ def backtest():
     btc_value = total_btc * current_price
     total_value = btc_value + cash
     
+    # 交易記錄一次轉成 DataFrame，之後的統計都用同一個布林遮罩，不再多次遍歷 list
+    df_trades = pd.DataFrame(trades, columns=['date', 'type', 'price', 'amount', 'usd', 'multiplier', 'reason'])
+    is_buy = df_trades['type'] == 'BUY'
+    buy_trades = df_trades[is_buy]
+    sell_trades = df_trades[~is_buy]
+    
     # 平均成本
-    total_buy_usd = sum(t['usd'] for t in trades if t['type'] == 'BUY')
-    total_buy_btc = sum(t['amount'] for t in trades if t['type'] == 'BUY')
+    total_buy_usd = buy_trades['usd'].sum()
+    total_buy_btc = buy_trades['amount'].sum()
     avg_cost = total_buy_usd / total_buy_btc if total_buy_btc > 0 else 0
     
     # HODL 對比
@@ -261,18 +283,15 @@ def backtest():
     print(f"  平均成本：${avg_cost:,.0f}/BTC")
     
     # 交易統計
-    buy_trades = [t for t in trades if t['type'] == 'BUY']
-    sell_trades = [t for t in trades if t['type'] == 'SELL']
-    
     print(f"\n交易統計：")
     print(f"  買入：{len(buy_trades)} 筆")
     print(f"  賣出：{len(sell_trades)} 筆")
     
-    if sell_trades:
+    if len(sell_trades):
         print(f"\n賣出記錄：")
-        for t in sell_trades:
-            print(f"  {t['date'].date()} | ${t['price']:>7,.0f} | {t['amount']:.6f} BTC → ${t['usd']:>10,.0f}")
-            print(f"    原因：{t['reason']}")
+        for t in sell_trades.itertuples(index=False):
+            print(f"  {t.date.date()} | ${t.price:>7,.0f} | {t.amount:.6f} BTC → ${t.usd:>10,.0f}")
+            print(f"    原因：{t.reason}")
     
     return total_value, hodl_value, trades
 
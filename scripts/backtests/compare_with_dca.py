@@ -4,50 +4,36 @@
 Hybrid SFP vs DCA BTC 績效比較
 """
 
-import pandas as pd
 import numpy as np
+import polars as pl
 
 def calculate_dca_btc():
     """計算 DCA BTC 績效"""
-    # 載入數據
-    df = pd.read_csv('data/backtest/BTC_USDT_15m_2023-2024.csv')
-    df['timestamp'] = pd.to_datetime(df['timestamp'])
-    
-    # 轉換為月度數據（每月1號投資）
-    df.set_index('timestamp', inplace=True)
-    monthly = df.resample('MS').first()  # MS = Month Start
+    # 載入數據並轉換為月度數據（每月1號投資）：Polars 多執行緒解析 CSV，只讀需要的兩欄
+    monthly = (
+        pl.scan_csv('data/backtest/BTC_USDT_15m_2023-2024.csv', try_parse_dates=True)
+        .select('timestamp', 'close')
+        .sort('timestamp')
+        .group_by_dynamic('timestamp', every='1mo')
+        .agg(pl.col('close').first())
+        .collect()
+    )
     
     print("="*70)
     print("DCA BTC 績效計算")
     print("="*70)
-    print(f"\n期間: {monthly.index[0]} 到 {monthly.index[-1]}")
+    print(f"\n期間: {monthly['timestamp'][0]} 到 {monthly['timestamp'][-1]}")
     print(f"月數: {len(monthly)}")
     
-    # DCA 策略：每月投入 $1000
+    # DCA 策略：每月投入 $1000；每月買入量只取決於當月價格，整段一次算完
     monthly_investment = 1000
-    total_invested = 0
-    total_btc = 0
-    
-    trades = []
-    for date, row in monthly.iterrows():
-        price = row['close']
-        btc_bought = monthly_investment / price
-        total_btc += btc_bought
-        total_invested += monthly_investment
-        
-        trades.append({
-            'date': date,
-            'price': price,
-            'btc_bought': btc_bought,
-            'total_btc': total_btc,
-            'total_invested': total_invested,
-            'current_value': total_btc * price
-        })
-    
-    df_trades = pd.DataFrame(trades)
+    prices = monthly['close'].to_numpy().astype(np.float64)
+    btc_bought = monthly_investment / prices
+    total_btc = np.cumsum(btc_bought)[-1]  # 依月份順序累加
+    total_invested = monthly_investment * len(prices)
     
     # 最終價值
-    final_price = monthly.iloc[-1]['close']
+    final_price = prices[-1]
     final_value = total_btc * final_price
     profit = final_value - total_invested
     roi = (profit / total_invested) * 100
@@ -4,13 +4,22 @@
 完整 DCA 回測：2021-2024 + Bootstrap 統計驗證
 """
 
+import sys
+from pathlib import Path
 import pandas as pd
-import pandas_ta as ta
+import polars as pl
 import numpy as np
+from dataclasses import dataclass
+from typing import Dict, Tuple
 from datetime import datetime
 import ccxt
 import time
 
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from core.indicator_kernels import rsi14
+
+DATA_PATH = 'data/backtest/BTC_2021_2024_daily.csv'
+
 # ========== 數據下載 ==========
 
 def download_full_data():
@@ -43,128 +52,54 @@ def download_full_data():
     df = pd.DataFrame(all_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
     df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
     df = df.drop_duplicates(subset=['timestamp'])
-    df.to_csv('data/backtest/BTC_2021_2024_daily.csv', index=False)
+    df.to_csv(DATA_PATH, index=False)
     
     print(f"\n✅ 完成！{len(df)} 天數據")
     return df
 
 
-# ========== DCA 策略 ==========
+def load_data() -> pl.DataFrame:
+    """載入日線數據（不存在時下載）"""
+    try:
+        df = (
+            pl.scan_csv(DATA_PATH, try_parse_dates=True)
+            .select(pl.col('timestamp').cast(pl.Date), 'open', 'high', 'low', 'close', 'volume')
+            .sort('timestamp')
+            .collect()
+        )
+        print(f"✅ 載入現有數據：{len(df)} 天")
+    except:
+        df = pl.from_pandas(download_full_data()).with_columns(pl.col('timestamp').cast(pl.Date))
+    return df
 
-def normal_dca(df, weekly_amount=250):
-    """普通 DCA：每週固定金額"""
-    df = df.copy()
-    if 'timestamp' in df.columns:
-        df = df.set_index('timestamp')
-    
-    df_weekly = df.resample('W').last().dropna()
-    
-    total_invested = 0
-    total_btc = 0
-    
-    for idx, row in df_weekly.iterrows():
-        price = row['close']
-        btc = weekly_amount / price
-        total_btc += btc
-        total_invested += weekly_amount
-    
-    final_value = total_btc * df_weekly.iloc[-1]['close']
-    roi = ((final_value / total_invested) - 1) * 100
+
+def build_arrays(weekly_close: np.ndarray) -> Dict[str, np.ndarray]:
+    """由週收盤價計算一次指標，回傳各策略共用的唯讀陣列"""
+    close = np.ascontiguousarray(weekly_close, dtype=np.float64)
+    rsi = rsi14(close)  # Wilder RSI，單次遍歷；暖機期為 NaN
     
-    return {
-        'invested': total_invested,
-        'btc': total_btc,
-        'final_value': final_value,
-        'roi': roi,
-        'avg_cost': total_invested / total_btc if total_btc > 0 else 0
-    }
+    arrays = {'close': close, 'rsi': rsi}
+    for arr in arrays.values():
+        arr.flags.writeable = False
+    return arrays
 
 
-def smart_dca_conservative(df, base_amount=250):
-    """保守 Smart DCA：只在極端時調整"""
-    df = df.copy()
-    if 'timestamp' in df.columns:
-        df = df.set_index('timestamp')
-    
-    df_weekly = df.resample('W').last().dropna()
-    
-    # 計算 RSI
-    df_weekly['rsi'] = ta.rsi(df_weekly['close'], length=14)
-    
-    total_invested = 0
-    total_btc = 0
-    
-    for idx, row in df_weekly.iterrows():
-        if pd.isna(row['rsi']):
-            continue
-        
-        price = row['close']
-        rsi = row['rsi']
-        
-        # 保守調整：只在極端時
-        if rsi < 25:  # 極度超賣
-            amount = base_amount * 2
-        elif rsi < 35:
-            amount = base_amount * 1.3
-        elif rsi > 80:  # 極度超買
-            amount = base_amount * 0.7
-        elif rsi > 75:
-            amount = base_amount * 0.85
-        else:
-            amount = base_amount
-        
-        btc = amount / price
-        total_btc += btc
-        total_invested += amount
-    
-    final_value = total_btc * df_weekly.iloc[-1]['close']
-    roi = ((final_value / total_invested) - 1) * 100
-    
-    return {
-        'invested': total_invested,
-        'btc': total_btc,
-        'final_value': final_value,
-        'roi': roi,
-        'avg_cost': total_invested / total_btc if total_btc > 0 else 0
-    }
+def weekly_arrays(df: pl.DataFrame) -> Dict[str, np.ndarray]:
+    """日線 -> 週線（週一至週日，取每週最後一根）-> 共用陣列"""
+    weekly = (
+        df.lazy()
+        .group_by_dynamic('timestamp', every='1w')
+        .agg(pl.col('close').last())
+        .collect()
+    )
+    return build_arrays(weekly['close'].to_numpy())
 
 
-def smart_dca_aggressive(df, base_amount=250):
-    """激進 Smart DCA：顯著調整"""
-    df = df.copy()
-    if 'timestamp' in df.columns:
-        df = df.set_index('timestamp')
-    
-    df_weekly = df.resample('W').last().dropna()
-    df_weekly['rsi'] = ta.rsi(df_weekly['close'], length=14)
-    
-    total_invested = 0
-    total_btc = 0
-    
-    for idx, row in df_weekly.iterrows():
-        if pd.isna(row['rsi']):
-            continue
-        
-        price = row['close']
-        rsi = row['rsi']
-        
-        # 激進調整
-        if rsi < 30:
-            amount = base_amount * 2.5
-        elif rsi < 40:
-            amount = base_amount * 1.8
-        elif rsi > 70:
-            amount = base_amount * 0.4
-        elif rsi > 60:
-            amount = base_amount * 0.7
-        else:
-            amount = base_amount
-        
-        btc = amount / price
-        total_btc += btc
-        total_invested += amount
-    
-    final_value = total_btc * df_weekly.iloc[-1]['close']
+# ========== DCA 策略 ==========
+
+def _summarize(total_invested, total_btc, last_price):
+    """整理回測結果"""
+    final_value = total_btc * last_price
     roi = ((final_value / total_invested) - 1) * 100
     
     return {
@@ -176,33 +111,81 @@ def smart_dca_aggressive(df, base_amount=250):
     }
 
 
+@dataclass(frozen=True)
+class StrategyParams:
+    """DCA 策略參數（RSI 門檻依序比對）"""
+    name: str
+    base_amount: float = 250
+    use_rsi: bool = True                    # False = 普通 DCA，從第一週開始投入
+    rsi_buy_levels: Tuple[float, ...] = ()  # RSI 低於門檻時加碼
+    rsi_buy_mults: Tuple[float, ...] = ()
+    rsi_sell_levels: Tuple[float, ...] = ()  # RSI 高於門檻時減碼
+    rsi_sell_mults: Tuple[float, ...] = ()
+
+
+# 普通 DCA：每週固定金額
+NORMAL_DCA = StrategyParams(name='普通 DCA', use_rsi=False)
+
+# 保守 Smart DCA：只在極端時調整
+CONSERVATIVE_DCA = StrategyParams(
+    name='Smart DCA (保守)',
+    rsi_buy_levels=(25, 35), rsi_buy_mults=(2.0, 1.3),     # 極度超賣 / 超賣
+    rsi_sell_levels=(80, 75), rsi_sell_mults=(0.7, 0.85)   # 極度超買 / 超買
+)
+
+# 激進 Smart DCA：顯著調整
+AGGRESSIVE_DCA = StrategyParams(
+    name='Smart DCA (激進)',
+    rsi_buy_levels=(30, 40), rsi_buy_mults=(2.5, 1.8),
+    rsi_sell_levels=(70, 60), rsi_sell_mults=(0.4, 0.7)
+)
+
+
+def _dca_amounts(rsi: np.ndarray, params: StrategyParams) -> np.ndarray:
+    """
+    每週投入金額，整段陣列一次計算
+    - RSI 依序比對 buy_levels（低於門檻加碼），未命中再比對 sell_levels（高於門檻減碼）
+    - np.select 取第一個成立的條件，與逐週依序比對相同；NaN 比較皆為 False
+    - RSI 暖機期（NaN）不投入；普通 DCA 不看 RSI，每週都投入
+    """
+    base = float(params.base_amount)
+    if not params.use_rsi:
+        return np.full(rsi.shape, base)
+    
+    conditions = [rsi < level for level in params.rsi_buy_levels] + \
+                 [rsi > level for level in params.rsi_sell_levels]
+    mults = params.rsi_buy_mults + params.rsi_sell_mults
+    amounts = base * np.select(conditions, mults, default=1.0) if conditions else np.full(rsi.shape, base)
+    return np.where(np.isnan(rsi), 0.0, amounts)
+
+
+def run_strategy(arrays: Dict[str, np.ndarray], params: StrategyParams) -> Dict:
+    """以共用陣列執行單一策略（純函數，不修改輸入）"""
+    close = arrays['close']
+    amounts = _dca_amounts(arrays['rsi'], params)
+    return _summarize(amounts.sum(), (amounts / close).sum(), close[-1])
+
+
 # ========== Bootstrap 統計驗證 ==========
 
-def bootstrap_test(df, strategy_func, n_iterations=100):
-    """Bootstrap 重抽樣測試策略穩定性"""
+def bootstrap_test(arrays, params, n_iterations=100):
+    """
+    Bootstrap 重抽樣測試策略穩定性
+    - 一次抽出 (次數, 週數) 的索引矩陣（有放回），每列依時間排序
+    - 每列重算 RSI 後，投入金額與報酬率沿週數軸整批計算
+    """
     print(f"\n執行 Bootstrap 測試（{n_iterations} 次）...")
     
-    df = df.copy()
-    if 'timestamp' in df.columns:
-        df = df.set_index('timestamp')
+    weekly_close = arrays['close']
+    n_weeks = len(weekly_close)
     
-    df_weekly = df.resample('W').last().dropna()
-    n_weeks = len(df_weekly)
+    sample_indices = np.sort(np.random.randint(0, n_weeks, size=(n_iterations, n_weeks)), axis=1)
+    sample_close = weekly_close[sample_indices]
+    sample_rsi = np.vstack([rsi14(row) for row in sample_close])  # Numba 核心，每列單次遍歷
     
-    results = []
-    
-    for i in range(n_iterations):
-        # 隨機抽樣（有放回）
-        sample_indices = np.random.choice(n_weeks, size=n_weeks, replace=True)
-        df_sample = df_weekly.iloc[sample_indices].copy()
-        df_sample = df_sample.sort_index()
-        
-        # 執行策略 - 直接傳遞已處理的df
-        result = strategy_func(df_sample)
-        results.append(result['roi'])
-        
-        if (i + 1) % 20 == 0:
-            print(f"  進度: {i+1}/{n_iterations}", end='\r')
+    amounts = _dca_amounts(sample_rsi, params)
+    total_btc = (amounts / sample_close).sum(axis=1)
+    results = (total_btc * sample_close[:, -1] / amounts.sum(axis=1) - 1) * 100
     
     return {
         'mean_roi': np.mean(results),
@@ -220,33 +203,21 @@ def main():
     print("="*70)
     
     # 下載或載入數據
-    try:
-        df = pd.read_csv('data/backtest/BTC_2021_2024_daily.csv')
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        print(f"✅ 載入現有數據：{len(df)} 天")
-    except:
-        df = download_full_data()
+    df = load_data()
     
-    print(f"\n期間：{df.iloc[0]['timestamp'].date()} 到 {df.iloc[-1]['timestamp'].date()}")
+    print(f"\n期間：{df['timestamp'][0]} 到 {df['timestamp'][-1]}")
     print(f"價格範圍：${df['low'].min():.0f} - ${df['high'].max():.0f}")
     
-    # 設置時間索引
-    df.set_index('timestamp', inplace=True)
+    # 週線與指標只計算一次，所有策略共用
+    arrays = weekly_arrays(df)
     
     # 基礎回測
     print("\n" + "="*70)
     print("策略回測")
     print("="*70)
     
-    normal = normal_dca(df.copy())
-    smart_cons = smart_dca_conservative(df.copy())
-    smart_agg = smart_dca_aggressive(df.copy())
-    
-    strategies = [
-        ('普通 DCA', normal),
-        ('Smart DCA (保守)', smart_cons),
-        ('Smart DCA (激進)', smart_agg)
-    ]
+    all_params = (NORMAL_DCA, CONSERVATIVE_DCA, AGGRESSIVE_DCA)
+    strategies = [(params.name, run_strategy(arrays, params)) for params in all_params]
     
     for name, result in strategies:
         print(f"\n【{name}】")
@@ -262,8 +233,8 @@ def main():
     print("="*70)
     print("執行100次重抽樣測試...")
     
-    boot_normal = bootstrap_test(df.copy(), normal_dca, 100)
-    boot_smart = bootstrap_test(df.copy(), smart_dca_conservative, 100)
+    boot_normal = bootstrap_test(arrays, NORMAL_DCA, 100)
+    boot_smart = bootstrap_test(arrays, CONSERVATIVE_DCA, 100)
     
     print("\n\n【Bootstrap 結果】")
     print(f"普通 DCA：{boot_normal['mean_roi']:.2f}% ± {boot_normal['std_roi']:.2f}%")
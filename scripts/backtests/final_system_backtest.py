@@ -5,24 +5,41 @@
 使用所有優化後的參數配置
 """
 
-import pandas as pd
-import pandas_ta as ta
 import numpy as np
 import os
-from datetime import datetime
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from core.backtest_kernels import scan_exits_parallel, settle_fixed_risk
+from core.backtest_signals import (
+    load_with_indicators, add_sfp_indicators, add_sweep_levels, silver_bullet_entries, hybrid_sfp_signals
+)
 
 DATA_DIR = 'data/backtest'
 SYMBOL = 'BTC/USDT'
 INITIAL_CAPITAL = 1000.0
 
 def load_data(timeframe):
+    """
+    載入本地數據並附上兩個策略所需的全部指標欄位（首次計算後讀 Parquet 快取）
+    - Silver Bullet 與 Hybrid SFP 共用同一個 df，不再各自重算
+    """
     filename = f"{DATA_DIR}/{SYMBOL.replace('/', '_')}_{timeframe}_2023-2024.csv"
     if os.path.exists(filename):
-        df = pd.read_csv(filename)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
-        return df
+        return load_with_indicators(filename)
     return None
 
+# ==================== 共用指標 ====================
+def add_indicators(df):
+    """
+    在 15m 數據上一次寫入兩個策略所需的全部指標欄位（原地修改並回傳同一個 df）
+    - 只在傳入的 df 不是來自 load_data（尚無指標欄位）時由各策略補算
+    """
+    add_sfp_indicators(df)
+    add_sweep_levels(df)
+    return df
+
 # ==================== Silver Bullet 策略 ====================
 def simulate_silver_bullet(df):
     """
@@ -31,77 +48,21 @@ def simulate_silver_bullet(df):
     - EMA 200
     - 時段限制
     """
-    df['ema_200'] = ta.ema(df['close'], length=200)
+    if 'lh_low' not in df.columns:
+        add_indicators(df)
     
-    trades = []
-    equity = INITIAL_CAPITAL
+    entry_idx, signal, sl, tp = silver_bullet_entries(df)
     
-    for i in range(210, len(df), 4):  # 每4根15m = 1小時
-        current = df.iloc[i]
-        prev_4h = df.iloc[i-4:i]
-        
-        if pd.isna(current.get('ema_200')):
-            continue
-        
-        # 時段限制
-        hour = current['timestamp'].hour
-        if not ((2 <= hour < 5) or (10 <= hour < 11)):
-            continue
-        
-        signal = None
-        sl = 0
-        
-        # 掃蕩形態
-        lh_low = prev_4h['low'].min()
-        if current['low'] < lh_low and current['close'] > lh_low:
-            if current['close'] > current['ema_200']:
-                signal = 'LONG'
-                sl = current['low']
-        
-        lh_high = prev_4h['high'].max()
-        if current['high'] > lh_high and current['close'] < lh_high:
-            if current['close'] < current['ema_200']:
-                signal = 'SHORT'
-                sl = current['high']
-        
-        if signal:
-            risk_amt = equity * 0.02
-            risk_dist = abs(current['close'] - sl)
-            
-            if risk_dist == 0:
-                continue
-            
-            # 盈虧比 1:2.5
-            tp = current['close'] + (risk_dist * 2.5) if signal == 'LONG' else current['close'] - (risk_dist * 2.5)
-            
-            metrics = {'pnl': 0, 'result': 'OPEN'}
-            
-            future = df.iloc[i+1:i+100]
-            for _, candle in future.iterrows():
-                if signal == 'LONG':
-                    if candle['low'] <= sl:
-                        metrics['pnl'] = -risk_amt
-                        metrics['result'] = 'LOSS'
-                        break
-                    if candle['high'] >= tp:
-                        metrics['pnl'] = risk_amt * 2.5
-                        metrics['result'] = 'WIN'
-                        break
-                else:
-                    if candle['high'] >= sl:
-                        metrics['pnl'] = -risk_amt
-                        metrics['result'] = 'LOSS'
-                        break
-                    if candle['low'] <= tp:
-                        metrics['pnl'] = risk_amt * 2.5
-                        metrics['result'] = 'WIN'
-                        break
-            
-            if metrics['result'] != 'OPEN':
-                equity += metrics['pnl']
-                trades.append(metrics)
+    # 從下一根開始往後檢查 99 根
+    _, _, result = scan_exits_parallel(
+        df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64),
+        entry_idx, signal, sl, tp, 99
+    )
+    
+    # 權益依序累積：每筆風險 2%，盈虧比 1:2.5
+    pnl, outcome, equity = settle_fixed_risk(result, INITIAL_CAPITAL, 0.02, 2.5)
     
-    return calculate_stats(trades, equity, 'Silver Bullet')
+    return calculate_stats(pnl, outcome, equity, 'Silver Bullet')
 
 # ==================== Hybrid SFP 策略 ====================
 def simulate_hybrid_sfp(df):
@@ -112,121 +73,43 @@ def simulate_hybrid_sfp(df):
     - 盈虧比 1:2.5
     - ADX > 25 (Trend)
     """
-    df['ema_200'] = ta.ema(df['close'], length=200)
-    df['rsi'] = ta.rsi(df['close'], length=14)
-    df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=14)
-    df['adx'] = ta.adx(df['high'], df['low'], df['close'], length=14)['ADX_14']
+    if 'swing_high' not in df.columns:
+        add_indicators(df)
     
-    bb = ta.bbands(df['close'], length=20, std=2.0)
-    if bb is not None:
-        cols = bb.columns
-        df['bb_upper'] = bb[cols[cols.str.startswith('BBU')][0]]
-        df['bb_lower'] = bb[cols[cols.str.startswith('BBL')][0]]
-        df['bw'] = bb[cols[cols.str.startswith('BBB')][0]]
+    signal, sl, tp, _ = hybrid_sfp_signals(df)
     
-    df['swing_high'] = df['high'].rolling(window=50).max().shift(1)
-    df['swing_low'] = df['low'].rolling(window=50).min().shift(1)
+    # 每16根15m = 4h；只取有訊號的 K 線（第 i-1 根為確認收盤的 K 線，從第 i 根開始檢查出場）
+    prev_idx = np.flatnonzero(signal[249:-1:16]) * 16 + 249
+    _, _, result = scan_exits_parallel(
+        df['high'].to_numpy(), df['low'].to_numpy(),  # 保留 float32，掃描只需比較
+        prev_idx + 1, signal[prev_idx], sl[prev_idx], tp[prev_idx], 400
+    )
     
-    trades = []
-    equity = INITIAL_CAPITAL
-    
-    for i in range(250, len(df), 16):  # 每16根15m = 4h
-        prev = df.iloc[i-1]
-        
-        if pd.isna(prev.get('adx')) or pd.isna(prev.get('rsi')):
-            continue
-        
-        signal = None
-        sl = 0
-        setup = None
-        
-        # SFP（ADX > 30, RSI 60/40）
-        if prev['adx'] > 30:
-            if prev['high'] > prev['swing_high'] and prev['close'] < prev['swing_high']:
-                if prev['rsi'] > 60:
-                    signal = 'SHORT'
-                    sl = prev['high']
-                    setup = 'SFP'
-            
-            elif prev['low'] < prev['swing_low'] and prev['close'] > prev['swing_low']:
-                if prev['rsi'] < 40:
-                    signal = 'LONG'
-                    sl = prev['low']
-                    setup = 'SFP'
-        
-        # Trend Breakout（ADX > 25）
-        if signal is None and pd.notna(prev.get('bb_upper')):
-            if prev['adx'] > 25:
-                bw_min = 5.0
-                
-                if prev['close'] > prev['bb_upper'] and prev['close'] > prev['ema_200'] and prev['bw'] > bw_min:
-                    signal = 'LONG'
-                    sl = prev['close'] - (2 * prev['atr'])
-                    setup = 'Trend'
-                
-                elif prev['close'] < prev['bb_lower'] and prev['close'] < prev['ema_200'] and prev['bw'] > bw_min:
-                    signal = 'SHORT'
-                    sl = prev['close'] + (2 * prev['atr'])
-                    setup = 'Trend'
-        
-        if signal:
-            risk_amt = equity * 0.02
-            risk_dist = abs(prev['close'] - sl)
-            
-            if risk_dist == 0:
-                continue
-            
-            # 盈虧比 1:2.5
-            tp = prev['close'] + (risk_dist * 2.5) if signal == 'LONG' else prev['close'] - (risk_dist * 2.5)
-            
-            metrics = {'pnl': 0, 'result': 'OPEN', 'setup': setup}
-            
-            future = df.iloc[i:i+400]
-            for _, candle in future.iterrows():
-                if signal == 'LONG':
-                    if candle['low'] <= sl:
-                        metrics['pnl'] = -risk_amt
-                        metrics['result'] = 'LOSS'
-                        break
-                    if candle['high'] >= tp:
-                        metrics['pnl'] = risk_amt * 2.5
-                        metrics['result'] = 'WIN'
-                        break
-                else:
-                    if candle['high'] >= sl:
-                        metrics['pnl'] = -risk_amt
-                        metrics['result'] = 'LOSS'
-                        break
-                    if candle['low'] <= tp:
-                        metrics['pnl'] = risk_amt * 2.5
-                        metrics['result'] = 'WIN'
-                        break
-            
-            if metrics['result'] != 'OPEN':
-                equity += metrics['pnl']
-                trades.append(metrics)
+    # 權益依序累積：每筆風險 2%，盈虧比 1:2.5
+    pnl, outcome, equity = settle_fixed_risk(result, INITIAL_CAPITAL, 0.02, 2.5)
     
-    return calculate_stats(trades, equity, 'Hybrid SFP')
+    return calculate_stats(pnl, outcome, equity, 'Hybrid SFP')
 
 # ==================== 統計計算 ====================
-def calculate_stats(trades, equity, strategy_name):
-    if not trades:
+def calculate_stats(pnl, outcome, equity, strategy_name):
+    """pnl / outcome 為已出場交易的陣列（outcome 1 = WIN、-1 = LOSS）"""
+    if pnl.size == 0:
         return None
     
-    df = pd.DataFrame(trades)
-    total_trades = len(trades)
-    wins = len(df[df['result'] == 'WIN'])
+    total_trades = pnl.size
+    is_win = outcome > 0
+    wins = int(np.count_nonzero(is_win))
     losses = total_trades - wins
     win_rate = (wins / total_trades) * 100
     total_return = ((equity - INITIAL_CAPITAL) / INITIAL_CAPITAL) * 100
     
     # Sharpe Ratio
-    returns = [t['pnl'] / INITIAL_CAPITAL for t in trades]
+    returns = pnl / INITIAL_CAPITAL
     sharpe = (np.mean(returns) / np.std(returns)) * np.sqrt(365) if np.std(returns) > 0 else 0
     
     # 期望值
-    avg_win = df[df['result'] == 'WIN']['pnl'].mean() if wins > 0 else 0
-    avg_loss = df[df['result'] == 'LOSS']['pnl'].mean() if losses > 0 else 0
+    avg_win = pnl[is_win].mean() if wins > 0 else 0
+    avg_loss = pnl[~is_win].mean() if losses > 0 else 0
     expectancy = (win_rate/100 * avg_win) + ((1-win_rate/100) * avg_loss)
     
     return {
@@ -11,55 +11,18 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 import pandas as pd
 import numpy as np
-from datetime import datetime
-import ccxt
 from core.position_manager import PositionManager
+from core.backtest_data import download_weekly_btc
 import logging
-import asyncio
-import requests
 
 logging.basicConfig(level=logging.WARNING)
 logger = logging.getLogger(__name__)
 
 
 def download_data():
-    """下載歷史數據"""
+    """下載歷史數據（共用 core.backtest_data）"""
     print("📥 下載數據中...")
-    exchange = ccxt.binance()
-    
-    ohlcv = exchange.fetch_ohlcv(
-        'BTC/USDT',
-        timeframe='1w',
-        since=int(datetime(2020, 1, 1).timestamp() * 1000),
-        limit=1000
-    )
-    
-    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
-    
-    # 計算技術指標
-    import pandas_ta as ta
-    df['rsi'] = ta.rsi(df['close'], length=14)
-    df['ma_200w'] = df['close'].rolling(window=200, min_periods=50).mean()
-    
-    # MVRV 代理
-    df['price_ratio'] = df['close'] / df['ma_200w']
-    def ratio_to_mvrv(ratio):
-        if pd.isna(ratio):
-            return 1.0
-        elif ratio < 1.0:
-            return max(0.0, ratio * 1.0)
-        elif ratio < 1.5:
-            return 1.0 + (ratio - 1.0) * 3.0
-        elif ratio < 2.0:
-            return 2.5 + (ratio - 1.5) * 3.0
-        elif ratio < 3.0:
-            return 4.0 + (ratio - 2.0) * 2.5
-        else:
-            return min(10.0, 6.5 + (ratio - 3.0) * 1.5)
-    
-    df['mvrv'] = df['price_ratio'].apply(ratio_to_mvrv)
-    
+    df = download_weekly_btc()
     print(f"✅ 數據下載完成：{len(df)} 週")
     return df
 
@@ -156,12 +119,17 @@ class HybridStrategy:
     
     def run(self, df):
         """執行回測"""
-        for idx, row in df.iterrows():
-            if pd.notna(row['mvrv']) and pd.notna(row['rsi']):
-                self.execute_week(row['date'], row['close'], row['mvrv'], row['rsi'])
+        # 持倉狀態有路徑依賴，仍需逐週執行；改讀 NumPy 純量，不再每週建立 Series
+        dates = df['date'].to_numpy()
+        closes = df['close'].to_numpy(dtype=np.float64)
+        mvrvs = df['mvrv'].to_numpy(dtype=np.float64)
+        rsis = df['rsi'].to_numpy(dtype=np.float64)
+        
+        for i in np.flatnonzero(~np.isnan(mvrvs) & ~np.isnan(rsis)):
+            self.execute_week(dates[i], closes[i], mvrvs[i], rsis[i])
         
         stats = self.position_manager.get_stats()
-        final_price = df.iloc[-1]['close']
+        final_price = closes[-1]
         final_value = stats['total_btc'] * final_price + self.cash
         
         return {
@@ -185,10 +153,7 @@ def main():
     
     # 1. HODL 基準
     print("\n📊 執行回測...")
-    total_btc_hodl = 0
-    for idx, row in df.iterrows():
-        if pd.notna(row['close']):
-            total_btc_hodl += 250 / row['close']
+    total_btc_hodl = (250 / df['close']).sum()  # sum() 略過 NaN
     
     final_price = df.iloc[-1]['close']
     results['HODL'] = {
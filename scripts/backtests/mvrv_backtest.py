@@ -20,11 +20,16 @@ import numpy as np
 from datetime import datetime, timedelta
 import ccxt
 from core.position_manager import PositionManager
+from core.backtest_data import ratio_to_mvrv
 import logging
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 交易記錄的 trade_type
+BUY = 1
+SELL = -1
+
 
 def download_historical_data(start_date='2020-01-01', end_date='2024-12-31'):
     """
@@ -85,22 +90,8 @@ def calculate_mvrv_proxy(df):
     df['ma_200w'] = df['close'].rolling(window=200, min_periods=50).mean()
     df['price_ratio'] = df['close'] / df['ma_200w']
     
-    # 非線性映射（越高倍數，MVRV 增長越快）
-    def ratio_to_mvrv(ratio):
-        if pd.isna(ratio):
-            return 1.0
-        elif ratio < 1.0:
-            return max(0.0, ratio * 1.0)  # 低於均線時線性
-        elif ratio < 1.5:
-            return 1.0 + (ratio - 1.0) * 3.0  # 1.5x → MVRV 2.5
-        elif ratio < 2.0:
-            return 2.5 + (ratio - 1.5) * 3.0  # 2.0x → MVRV 4.0
-        elif ratio < 3.0:
-            return 4.0 + (ratio - 2.0) * 2.5  # 3.0x → MVRV 6.5
-        else:
-            return min(10.0, 6.5 + (ratio - 3.0) * 1.5)  # 限制最高 10
-    
-    df['mvrv_proxy'] = df['price_ratio'].apply(ratio_to_mvrv)
+    # 非線性映射（越高倍數，MVRV 增長越快），與其他週線回測共用同一映射
+    df['mvrv_proxy'] = ratio_to_mvrv(df['price_ratio'].to_numpy())
     
     return df
 
@@ -129,10 +120,33 @@ class MVRVStrategy:
         self.cash = initial_cash
         self.position_manager = PositionManager(core_ratio=core_ratio, data_file=None)
         
-        # 交易記錄
-        self.trades = []
+        # 交易記錄：run_backtest 依週數重新配置
+        self._reset_trades(0, 'datetime64[ns]')
         self.weekly_log = []
     
+    def _reset_trades(self, n_max, date_dtype):
+        """預先配置交易記錄陣列（每個欄位一個陣列），只在回測開始時配置一次"""
+        self.trade_date = np.empty(n_max, dtype=date_dtype)
+        self.trade_type = np.empty(n_max, dtype=np.int8)
+        self.trade_price = np.empty(n_max)
+        self.trade_amount = np.empty(n_max)
+        self.trade_usd = np.empty(n_max)
+        self.trade_mvrv = np.empty(n_max)
+        self.trade_profit = np.empty(n_max)  # 買入為 NaN
+        self.n_trades = 0
+    
+    def _record_trade(self, date, trade_type, price, amount, usd_value, mvrv, profit=np.nan):
+        """寫入下一筆交易（取代逐筆建立 dict）"""
+        k = self.n_trades
+        self.trade_date[k] = date
+        self.trade_type[k] = trade_type
+        self.trade_price[k] = price
+        self.trade_amount[k] = amount
+        self.trade_usd[k] = usd_value
+        self.trade_mvrv[k] = mvrv
+        self.trade_profit[k] = profit
+        self.n_trades = k + 1
+    
     def get_buy_multiplier(self, mvrv):
         """
         根據 MVRV 決定買入倍數（文檔策略）
@@ -206,14 +220,7 @@ class MVRVStrategy:
             action = "BUY"
             details = f"{buy_amount_btc:.6f} BTC @ ${price:,.0f} (${buy_amount_usd:.0f}, {buy_multiplier}x)"
             
-            self.trades.append({
-                'date': date,
-                'action': 'BUY',
-                'price': price,
-                'amount': buy_amount_btc,
-                'usd_value': buy_amount_usd,
-                'mvrv': mvrv
-            })
+            self._record_trade(date, BUY, price, buy_amount_btc, buy_amount_usd, mvrv)
         
         # 2. 決定是否賣出（只有交易倉可賣）
         sell_pct = self.get_sell_percentage(mvrv)
@@ -232,15 +239,9 @@ class MVRVStrategy:
                     action = "SELL" if buy_multiplier == 0 else "BUY+SELL"
                     details += f" | 賣出 {sell_amount:.6f} BTC → ${result['total_revenue']:,.0f} (獲利 ${result['total_profit']:,.0f})"
                     
-                    self.trades.append({
-                        'date': date,
-                        'action': 'SELL',
-                        'price': price,
-                        'amount': sell_amount,
-                        'usd_value': result['total_revenue'],
-                        'mvrv': mvrv,
-                        'profit': result['total_profit']
-                    })
+                    self._record_trade(
+                        date, SELL, price, sell_amount, result['total_revenue'], mvrv, result['total_profit']
+                    )
                     
                 except ValueError as e:
                     logger.warning(f"賣出失敗: {e}")
@@ -272,6 +273,9 @@ class MVRVStrategy:
         print(f"   基礎週投入：${self.base_weekly}")
         print("=" * 70)
         
+        # 每週最多一買一賣
+        self._reset_trades(2 * len(df), df['date'].to_numpy().dtype)
+        
         for idx, row in df.iterrows():
             self.execute_week(
                 date=row['date'],
@@ -285,6 +289,7 @@ class MVRVStrategy:
         final_pnl = self.position_manager.get_unrealized_pnl(final_price)
         
         total_invested = final_stats['total_invested']
+        trade_type = self.trade_type[:self.n_trades]
         final_portfolio_value = final_pnl['current_value'] + self.cash
         
         print(f"\n📊 回測結果")
@@ -306,8 +311,8 @@ class MVRVStrategy:
             'roi_pct': final_pnl['roi_pct'],
             'avg_cost': final_stats['avg_cost'],
             'core_avg_cost': final_stats['core_avg_cost'],
-            'num_buys': len([t for t in self.trades if t['action'] == 'BUY']),
-            'num_sells': len([t for t in self.trades if t['action'] == 'SELL'])
+            'num_buys': int(np.count_nonzero(trade_type == BUY)),
+            'num_sells': int(np.count_nonzero(trade_type == SELL))
         }
 
 
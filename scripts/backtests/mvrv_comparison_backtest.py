@@ -11,14 +11,9 @@
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
-import requests
 import logging
-import sys
 import os
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -132,43 +127,28 @@ def calculate_improved_mvrv(df):
 
 
 def get_composite_score(mvrv, rsi=50, fg=50):
-    """計算加權綜合分數"""
-    # MVRV → 分數
-    if mvrv < 0.1:
-        mvrv_score = 0
-    elif mvrv < 1.0:
-        mvrv_score = 10
-    elif mvrv < 3.0:
-        mvrv_score = 30
-    elif mvrv < 5.0:
-        mvrv_score = 50
-    elif mvrv < 6.0:
-        mvrv_score = 65
-    elif mvrv < 7.0:
-        mvrv_score = 80
-    elif mvrv < 9.0:
-        mvrv_score = 90
-    else:
-        mvrv_score = 100
+    """計算加權綜合分數（可直接傳入整段 NumPy 陣列）"""
+    mvrv = np.asarray(mvrv, dtype=np.float64)
+    
+    # MVRV → 分數（依序比對門檻，NaN 落入最後一檔，與逐筆 if/elif 一致）
+    mvrv_score = np.select(
+        [mvrv < 0.1, mvrv < 1.0, mvrv < 3.0, mvrv < 5.0, mvrv < 6.0, mvrv < 7.0, mvrv < 9.0],
+        [0, 10, 30, 50, 65, 80, 90],
+        default=100
+    )
     
     # 加權：MVRV 65% + RSI 25% + F&G 10%
     return (mvrv_score * 0.65) + (rsi * 0.25) + (fg * 0.10)
 
 
 def get_buy_multiplier(score):
-    """根據綜合分數決定買入倍數"""
-    if score < 15:
-        return 3.5
-    elif score < 25:
-        return 2.0
-    elif score < 35:
-        return 1.5
-    elif score < 50:
-        return 1.0
-    elif score < 60:
-        return 0.5
-    else:
-        return 0.0
+    """根據綜合分數決定買入倍數（可直接傳入整段 NumPy 陣列）"""
+    score = np.asarray(score, dtype=np.float64)
+    return np.select(
+        [score < 15, score < 25, score < 35, score < 50, score < 60],
+        [3.5, 2.0, 1.5, 1.0, 0.5],
+        default=0.0
+    )
 
 
 def backtest_strategy(df, mvrv_column, weekly_usd=250):
@@ -181,38 +161,34 @@ def backtest_strategy(df, mvrv_column, weekly_usd=250):
         weekly_usd: 每週基礎投入金額
     
     Returns:
-        dict: 回測結果
+        dict: 回測結果（trades 為逐週明細 DataFrame）
     """
-    total_btc = 0.0
-    total_invested = 0.0
-    trades = []
-    
-    for date, row in df.iterrows():
-        price = row['close']
-        mvrv = row[mvrv_column]
-        
-        # 計算綜合分數（簡化：只用 MVRV）
-        score = get_composite_score(mvrv)
-        multiplier = get_buy_multiplier(score)
-        
-        buy_usd = weekly_usd * multiplier
-        buy_btc = buy_usd / price if buy_usd > 0 else 0
-        
-        total_btc += buy_btc
-        total_invested += buy_usd
-        
-        trades.append({
-            'date': date,
-            'price': price,
-            'mvrv': mvrv,
-            'score': score,
-            'multiplier': multiplier,
-            'buy_usd': buy_usd,
-            'buy_btc': buy_btc,
-            'total_btc': total_btc
-        })
-    
-    final_price = df['close'].iloc[-1]
+    price = df['close'].to_numpy(dtype=np.float64)
+    mvrv = df[mvrv_column].to_numpy(dtype=np.float64)
+    
+    # 每週買入金額只取決於當週 MVRV，整段一次算完
+    score = get_composite_score(mvrv)  # 簡化：只用 MVRV
+    multiplier = get_buy_multiplier(score)
+    
+    buy_usd = weekly_usd * multiplier
+    buy_btc = buy_usd / price
+    cum_btc = np.cumsum(buy_btc)
+    
+    total_btc = float(cum_btc[-1])
+    total_invested = float(buy_usd.sum())
+    
+    trades = pd.DataFrame({
+        'date': df.index,
+        'price': price,
+        'mvrv': mvrv,
+        'score': score,
+        'multiplier': multiplier,
+        'buy_usd': buy_usd,
+        'buy_btc': buy_btc,
+        'total_btc': cum_btc
+    })
+    
+    final_price = price[-1]
     final_value = total_btc * final_price
     avg_cost = total_invested / total_btc if total_btc > 0 else 0
     
@@ -228,17 +204,12 @@ def backtest_strategy(df, mvrv_column, weekly_usd=250):
 
 def hodl_backtest(df, weekly_usd=250):
     """HODL 對照組：每週固定買入"""
-    total_btc = 0.0
-    total_invested = 0.0
+    price = df['close'].to_numpy(dtype=np.float64)
     
-    for date, row in df.iterrows():
-        price = row['close']
-        buy_btc = weekly_usd / price
-        
-        total_btc += buy_btc
-        total_invested += weekly_usd
+    total_btc = float((weekly_usd / price).sum())
+    total_invested = float(weekly_usd * len(price))
     
-    final_price = df['close'].iloc[-1]
+    final_price = price[-1]
     final_value = total_btc * final_price
     avg_cost = total_invested / total_btc if total_btc > 0 else 0
     
@@ -327,7 +298,7 @@ def main():
         print("\n⚠️ 舊公式表現更好，需要進一步分析")
     
     # 6. 保存詳細結果
-    trades_df = pd.DataFrame(result_improved['trades'])
+    trades_df = result_improved['trades']
     save_path = os.path.join(os.path.dirname(__file__), 'mvrv_comparison_result.csv')
     trades_df.to_csv(save_path, index=False)
     print(f"\n📁 詳細交易記錄已保存到: {save_path}")
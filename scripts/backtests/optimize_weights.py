@@ -11,9 +11,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 import pandas as pd
 import numpy as np
-from datetime import datetime
-import ccxt
 from core.position_manager import PositionManager
+from core.backtest_data import download_weekly_btc
 import logging
 from itertools import product
 
@@ -21,47 +20,9 @@ logging.basicConfig(level=logging.WARNING)
 
 
 def download_data():
-    """下載數據"""
+    """下載數據（共用 core.backtest_data）"""
     print("📥 下載數據...")
-    exchange = ccxt.binance()
-    
-    ohlcv = exchange.fetch_ohlcv(
-        'BTC/USDT',
-        timeframe='1w',
-        since=int(datetime(2020, 1, 1).timestamp() * 1000),
-        limit=1000
-    )
-    
-    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
-    
-    import pandas_ta as ta
-    df['rsi'] = ta.rsi(df['close'], length=14)
-    df['ma_200w'] = df['close'].rolling(window=200, min_periods=50).mean()
-    
-    # MVRV 代理
-    df['price_ratio'] = df['close'] / df['ma_200w']
-    def ratio_to_mvrv(ratio):
-        if pd.isna(ratio):
-            return 1.0
-        elif ratio < 1.0:
-            return max(0.0, ratio * 1.0)
-        elif ratio < 1.5:
-            return 1.0 + (ratio - 1.0) * 3.0
-        elif ratio < 2.0:
-            return 2.5 + (ratio - 1.5) * 3.0
-        elif ratio < 3.0:
-            return 4.0 + (ratio - 2.0) * 2.5
-        else:
-            return min(10.0, 6.5 + (ratio - 3.0) * 1.5)
-    
-    df['mvrv'] = df['price_ratio'].apply(ratio_to_mvrv)
-    
-    # F&G 代理
-    df['momentum'] = df['close'].pct_change(4)
-    df['fg_proxy'] = 50 + df['momentum'] * 100
-    df['fg_proxy'] = df['fg_proxy'].clip(0, 100)
-    
+    df = download_weekly_btc()
     print(f"✅ 完成：{len(df)} 週")
     return df
 
@@ -132,29 +93,35 @@ class WeightedStrategy:
             return 1.0
     
     def run(self, df):
-        for idx, row in df.iterrows():
-            if pd.notna(row['mvrv']) and pd.notna(row['rsi']):
-                score = self.calculate_score(row['mvrv'], row['rsi'], row['fg_proxy'])
-                
-                # 買入
-                multiplier = self.get_buy_multiplier(score)
-                if multiplier > 0:
-                    buy_usd = self.base_weekly * multiplier
-                    buy_btc = buy_usd / row['close']
-                    self.pm.add_buy(buy_btc, row['close'], "")
-                    self.cash -= buy_usd
-                
-                # 賣出
-                sell_pct = self.get_sell_pct(score)
-                if sell_pct > 0:
-                    stats = self.pm.get_stats()
-                    if stats['trade_btc'] > 0:
-                        sell_btc = stats['trade_btc'] * sell_pct
-                        try:
-                            result = self.pm.execute_sell_hifo(sell_btc, row['close'])
-                            self.cash += result['total_revenue']
-                        except:
-                            pass
+        # 持倉狀態有路徑依賴，仍需逐週執行；改讀 NumPy 純量，不再每週建立 Series
+        closes = df['close'].to_numpy(dtype=np.float64)
+        mvrvs = df['mvrv'].to_numpy(dtype=np.float64)
+        rsis = df['rsi'].to_numpy(dtype=np.float64)
+        fg_proxies = df['fg_proxy'].to_numpy(dtype=np.float64)
+        
+        for i in np.flatnonzero(~np.isnan(mvrvs) & ~np.isnan(rsis)):
+            price = closes[i]
+            score = self.calculate_score(mvrvs[i], rsis[i], fg_proxies[i])
+            
+            # 買入
+            multiplier = self.get_buy_multiplier(score)
+            if multiplier > 0:
+                buy_usd = self.base_weekly * multiplier
+                buy_btc = buy_usd / price
+                self.pm.add_buy(buy_btc, price, "")
+                self.cash -= buy_usd
+            
+            # 賣出
+            sell_pct = self.get_sell_pct(score)
+            if sell_pct > 0:
+                stats = self.pm.get_stats()
+                if stats['trade_btc'] > 0:
+                    sell_btc = stats['trade_btc'] * sell_pct
+                    try:
+                        result = self.pm.execute_sell_hifo(sell_btc, price)
+                        self.cash += result['total_revenue']
+                    except:
+                        pass
         
         stats = self.pm.get_stats()
         return stats['total_btc'], stats['avg_cost']
@@ -168,7 +135,7 @@ def main():
     df = download_data()
     
     # HODL 基準
-    total_btc_hodl = sum(250 / row['close'] for idx, row in df.iterrows() if pd.notna(row['close']))
+    total_btc_hodl = (250 / df['close']).sum()  # sum() 略過 NaN
     
     print(f"\nHODL 基準：{total_btc_hodl:.6f} BTC\n")
     
@@ -52,18 +52,17 @@ def calculate_buy_score(row, df, idx):
     """
     score = 0
     
-    # 1. RSI 超賣 (最高 30 分)
+    # 1. RSI 超賣 (最高 30 分)；指標為 NaN 時比較結果為 False，不需另外檢查
     rsi = row['rsi']
-    if pd.notna(rsi):
-        if rsi < 30:
-            score += 30  # 極度超賣
-        elif rsi < 40:
-            score += 20
-        elif rsi < 50:
-            score += 10
+    if rsi < 30:
+        score += 30  # 極度超賣
+    elif rsi < 40:
+        score += 20
+    elif rsi < 50:
+        score += 10
     
     # 2. 價格 vs MA200 (最高 25 分)
-    if pd.notna(row['ma_200']) and row['close'] < row['ma_200']:
+    if row['close'] < row['ma_200']:
         discount = (row['ma_200'] - row['close']) / row['ma_200']
         score += min(25, discount * 100)
     
@@ -77,9 +76,9 @@ def calculate_buy_score(row, df, idx):
             score += 15
     
     # 4. Bollinger Bands (最高 20 分)
-    if pd.notna(row['bb_lower']) and row['close'] < row['bb_lower']:
+    if row['close'] < row['bb_lower']:
         score += 20  # 跌破下軌
-    elif pd.notna(row['bb_middle']) and row['close'] < row['bb_middle']:
+    elif row['close'] < row['bb_middle']:
         score += 10
     
     return min(100, score)
@@ -101,18 +100,17 @@ def calculate_sell_score(row, df, idx, entry_price, current_holdings):
     score = 0
     profit_pct = ((row['close'] - entry_price) / entry_price) * 100
     
-    # 1. RSI 超買 (最高 30 分)
+    # 1. RSI 超買 (最高 30 分)；指標為 NaN 時比較結果為 False，不需另外檢查
     rsi = row['rsi']
-    if pd.notna(rsi):
-        if rsi > 70:
-            score += 30  # 極度超買
-        elif rsi > 60:
-            score += 20
-        elif rsi > 55:
-            score += 10
+    if rsi > 70:
+        score += 30  # 極度超買
+    elif rsi > 60:
+        score += 20
+    elif rsi > 55:
+        score += 10
     
     # 2. 價格 vs MA200 (最高 20 分)
-    if pd.notna(row['ma_200']) and row['close'] > row['ma_200']:
+    if row['close'] > row['ma_200']:
         premium = (row['close'] - row['ma_200']) / row['ma_200']
         score += min(20, premium * 50)
     
@@ -134,7 +132,7 @@ def calculate_sell_score(row, df, idx, entry_price, current_holdings):
         score += 10
     
     # 5. Bollinger Bands (加分)
-    if pd.notna(row['bb_upper']) and row['close'] > row['bb_upper']:
+    if row['close'] > row['bb_upper']:
         score += 10  # 突破上軌
     
     # 6. 止損保護 (強制賣出)
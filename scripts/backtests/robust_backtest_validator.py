@@ -8,9 +8,10 @@
 - 穩健性評分系統
 """
 
+import io
 import numpy as np
 from scipy import stats
-from typing import List, Dict, Any
+from typing import List, Dict, Any, TextIO
 
 
 class RobustValidator:
@@ -19,14 +20,16 @@ class RobustValidator:
     解決 95% CI 假設常態分佈與極端值依賴的問題
     """
     
-    def __init__(self, n_bootstrap: int = 1000, trim_percent: float = 0.05):
+    def __init__(self, n_bootstrap: int = 1000, trim_percent: float = 0.05, seed: int = 42):
         """
         Args:
             n_bootstrap: Bootstrap 重抽樣次數
             trim_percent: 修剪比例（兩端各去除的百分比）
+            seed: 亂數種子（固定後同一組回報的結果可重現，方便 A/B 比較）
         """
         self.n_bootstrap = n_bootstrap
         self.trim_percent = trim_percent
+        self.seed = seed
     
     # ==================== 主驗證介面 ====================
     
@@ -86,13 +89,12 @@ class RobustValidator:
         """
         Bootstrap 95% 信賴區間（不假設分佈）
         """
-        bootstrap_means = []
         n = len(returns)
         
-        for _ in range(self.n_bootstrap):
-            # 有放回抽樣
-            sample = np.random.choice(returns, size=n, replace=True)
-            bootstrap_means.append(np.mean(sample))
+        # 有放回抽樣：一次抽出所有重抽樣的索引（n_bootstrap x n），逐列取平均
+        rng = np.random.default_rng(self.seed)
+        sample_idx = rng.integers(0, n, size=(self.n_bootstrap, n))
+        bootstrap_means = returns[sample_idx].mean(axis=1)
         
         # 計算百分位數
         alpha = 1 - confidence
@@ -301,56 +303,67 @@ class RobustValidator:
         """
         生成文字報告
         """
+        buf = io.StringIO()
+        self.write_report(results, buf, strategy_name)
+        return buf.getvalue().rstrip('\n')
+    
+    def write_report(self, results: Dict[str, Any], out: TextIO, strategy_name: str = '') -> None:
+        """
+        逐行寫出文字報告到 out（檔案或 StringIO），不先組成整份字串
+        """
+        def line(msg: str) -> None:
+            out.write(msg + '\n')
+        
         if 'error' in results:
-            return f"❌ {results['error']}"
+            line(f"❌ {results['error']}")
+            return
         
-        report = []
-        report.append("=" * 70)
-        report.append(f"🔒 穩健性驗證報告{' - ' + strategy_name if strategy_name else ''}")
-        report.append("=" * 70)
+        line("=" * 70)
+        line(f"🔒 穩健性驗證報告{' - ' + strategy_name if strategy_name else ''}")
+        line("=" * 70)
         
         # Bootstrap CI
         bs = results['bootstrap_ci']
-        report.append(f"\n📊 Bootstrap 信賴區間（{self.n_bootstrap} 次重抽樣）：")
-        report.append(f"  平均: {bs['mean']:.2f}%")
-        report.append(f"  95% CI: [{bs['ci_lower']:.2f}%, {bs['ci_upper']:.2f}%]")
-        report.append(f"  標準差: {bs['std']:.2f}%")
+        line(f"\n📊 Bootstrap 信賴區間（{self.n_bootstrap} 次重抽樣）：")
+        line(f"  平均: {bs['mean']:.2f}%")
+        line(f"  95% CI: [{bs['ci_lower']:.2f}%, {bs['ci_upper']:.2f}%]")
+        line(f"  標準差: {bs['std']:.2f}%")
         
         # Trimmed Mean
         tm = results['trimmed_stats']
-        report.append(f"\n📉 去除極端值分析（修剪 {tm['trim_percent']:.0f}%）：")
-        report.append(f"  完整樣本平均: {tm['full_mean']:.2f}%")
-        report.append(f"  修剪後平均: {tm['trimmed_mean']:.2f}%")
-        report.append(f"  極端值影響: {tm['impact_percent']:+.2f}%")
+        line(f"\n📉 去除極端值分析（修剪 {tm['trim_percent']:.0f}%）：")
+        line(f"  完整樣本平均: {tm['full_mean']:.2f}%")
+        line(f"  修剪後平均: {tm['trimmed_mean']:.2f}%")
+        line(f"  極端值影響: {tm['impact_percent']:+.2f}%")
         if abs(tm['impact_percent']) > 20:
-            report.append(f"  ⚠️ 策略高度依賴極端值")
+            line(f"  ⚠️ 策略高度依賴極端值")
         
         # Worst Case
         wc = results['worst_case']
-        report.append(f"\n⚠️ 最差情境分析：")
-        report.append(f"  最差 10% 平均: {wc['worst_10_mean']:.2f}%")
-        report.append(f"  最差單次: {wc['worst_single']:.2f}%")
-        report.append(f"  負報酬比例: {wc['negative_percent']:.1f}%")
-        report.append(f"  最大連續虧損: {wc['max_consecutive_losses']} 次")
+        line(f"\n⚠️ 最差情境分析：")
+        line(f"  最差 10% 平均: {wc['worst_10_mean']:.2f}%")
+        line(f"  最差單次: {wc['worst_single']:.2f}%")
+        line(f"  負報酬比例: {wc['negative_percent']:.1f}%")
+        line(f"  最大連續虧損: {wc['max_consecutive_losses']} 次")
         
         # Distribution
         dist = results['distribution']
-        report.append(f"\n📐 分佈特性：")
-        report.append(f"  類型: {dist['distribution_type']}")
-        report.append(f"  偏度: {dist['skewness']:.2f}")
-        report.append(f"  峰度: {dist['kurtosis']:.2f}")
+        line(f"\n📐 分佈特性：")
+        line(f"  類型: {dist['distribution_type']}")
+        line(f"  偏度: {dist['skewness']:.2f}")
+        line(f"  峰度: {dist['kurtosis']:.2f}")
         if not dist['is_normal_distribution']:
-            report.append(f"  ⚠️ 非常態分佈（t-test 可能不準確）")
+            line(f"  ⚠️ 非常態分佈（t-test 可能不準確）")
         
         # Robustness Score
-        report.append(f"\n🎯 穩健性評分：")
-        report.append(f"  分數: {results['robustness_score']:.1f}/100")
-        report.append(f"  評級: {results['rating']}")
-        report.append(f"  樣本數: {results['sample_size']}")
+        line(f"\n🎯 穩健性評分：")
+        line(f"  分數: {results['robustness_score']:.1f}/100")
+        line(f"  評級: {results['rating']}")
+        line(f"  樣本數: {results['sample_size']}")
         
-        report.append("=" * 70)
-        
-        return "\n".join(report)
+        line("=" * 70)
+
+
 
 
 # ==================== 測試函數 ====================
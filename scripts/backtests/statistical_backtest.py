@@ -8,20 +8,36 @@
 - 考慮策略特性（時間框架、時段限制）
 """
 
+import os
+import sys
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
 import ccxt
 import pandas as pd
-import pandas_ta as ta
 import numpy as np
-from datetime import datetime, timedelta
-import random
 import time
 from scipy import stats
 
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from core.backtest_kernels import scan_exits, settle_fixed_risk
+from core.backtest_signals import (
+    OHLCV_COLUMNS, load_ohlcv, add_sfp_indicators, add_sweep_levels, silver_bullet_entries, hybrid_sfp_signals
+)
+
+
 class StatisticalBacktester:
-    def __init__(self, symbol='BTC/USDT'):
+    def __init__(self, symbol='BTC/USDT', seed=42):
+        """
+        Args:
+            symbol: 交易對
+            seed: 抽樣區間的亂數種子（固定後每次執行抽到同一組區間，方便 A/B 比較；None 為每次不同）
+        """
         self.symbol = symbol
+        self.seed = seed
         self.exchange = ccxt.binance()
         self.initial_capital = 1000.0
+        self._local_data = {}  # timeframe -> 完整本地數據（各抽樣區間共用，只讀一次）
     
     # ==================== 數據抓取 ====================
     
@@ -65,15 +81,19 @@ class StatisticalBacktester:
                 time.sleep(2)
                 continue
         
-        df = pd.DataFrame(all_data, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        # 先整批轉成 float64 矩陣再按列切片，省去 list-of-lists 逐列轉型
+        arr = np.asarray(all_data, dtype=np.float64).reshape(-1, 6)
+        df = pd.DataFrame({
+            'timestamp': pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms'),
+            'open': arr[:, 1], 'high': arr[:, 2], 'low': arr[:, 3], 'close': arr[:, 4], 'volume': arr[:, 5]
+        })
         
         print(f"  抓取完成: {len(df)} 根 K 線")
         return df
     
     # ==================== 抽樣策略 ====================
     
-    def generate_sample_periods(self, total_start, total_end, n_samples=20, period_months=3):
+    def generate_sample_periods(self, total_start, total_end, n_samples=20, period_months=3, seed=None):
         """
         生成隨機不重疊時間區間
         
@@ -82,6 +102,7 @@ class StatisticalBacktester:
             total_end: '2024-12-31'
             n_samples: 抽樣數量
             period_months: 每個區間月數
+            seed: 隨機種子（None 為每次不同；固定種子可重現同一組區間）
         """
         start = pd.to_datetime(total_start)
         end = pd.to_datetime(total_end)
@@ -90,22 +111,18 @@ class StatisticalBacktester:
         period_days = period_months * 30
         
         # 生成所有可能的起始點
-        possible_starts = list(range(0, total_days - period_days, period_days))
-        
-        # 隨機選擇 n 個不重疊區間
-        selected = random.sample(possible_starts, min(n_samples, len(possible_starts)))
-        
-        samples = []
-        for offset in sorted(selected):
-            sample_start = start + timedelta(days=offset)
-            sample_end = sample_start + timedelta(days=period_days)
-            
-            samples.append({
-                'start': sample_start.strftime('%Y-%m-%d'),
-                'end': sample_end.strftime('%Y-%m-%d')
-            })
-        
-        return samples
+        possible_starts = np.arange(0, total_days - period_days, period_days)
+        
+        # 隨機選擇 n 個不重疊區間：一次抽出所有起始點（PCG64），日期整批換算
+        rng = np.random.default_rng(seed)
+        selected = np.sort(rng.choice(possible_starts, size=min(n_samples, len(possible_starts)), replace=False))
+        sample_starts = start + pd.to_timedelta(selected, unit='D')
+        sample_ends = sample_starts + pd.Timedelta(days=period_days)
+        
+        return [
+            {'start': s, 'end': e}
+            for s, e in zip(sample_starts.strftime('%Y-%m-%d'), sample_ends.strftime('%Y-%m-%d'))
+        ]
     
     # ==================== Silver Bullet 回測 ====================
     
@@ -116,76 +133,20 @@ class StatisticalBacktester:
         - 時段限制：2-5am, 10-11am UTC
         - 盈虧比 1:2.5
         """
-        df['ema_200'] = ta.ema(df['close'], length=200)
+        add_sweep_levels(df)
+        entry_idx, signal, sl, tp = silver_bullet_entries(df)
         
-        trades = []
-        equity = self.initial_capital
+        # 從下一根開始往後檢查 99 根；使用已快取的單執行緒 Numba 核心（進程池已依抽樣區間平行），
+        # 進程池的每個 worker 直接載入磁碟上的編譯結果，逐筆找到出場即停止
+        _, _, result = scan_exits(
+            df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64),
+            entry_idx, signal, sl, tp, 99
+        )
         
-        for i in range(210, len(df), 4):  # 每4根15m = 1小時
-            current = df.iloc[i]
-            prev_4h = df.iloc[i-4:i]
-            
-            if pd.isna(current.get('ema_200')):
-                continue
-            
-            # 時段限制（UTC）
-            hour = current['timestamp'].hour
-            if not ((2 <= hour < 5) or (10 <= hour < 11)):
-                continue
-            
-            signal = None
-            sl = 0
-            
-            # 掃蕩形態
-            lh_low = prev_4h['low'].min()
-            if current['low'] < lh_low and current['close'] > lh_low:
-                if current['close'] > current['ema_200']:
-                    signal = 'LONG'
-                    sl = current['low']
-            
-            lh_high = prev_4h['high'].max()
-            if current['high'] > lh_high and current['close'] < lh_high:
-                if current['close'] < current['ema_200']:
-                    signal = 'SHORT'
-                    sl = current['high']
-            
-            if signal:
-                risk_amt = equity * 0.02
-                risk_dist = abs(current['close'] - sl)
-                
-                if risk_dist == 0:
-                    continue
-                
-                tp = current['close'] + (risk_dist * 2.5) if signal == 'LONG' else current['close'] - (risk_dist * 2.5)
-                
-                metrics = {'pnl': 0, 'result': 'OPEN'}
-                
-                future = df.iloc[i+1:i+100]
-                for _, candle in future.iterrows():
-                    if signal == 'LONG':
-                        if candle['low'] <= sl:
-                            metrics['pnl'] = -risk_amt
-                            metrics['result'] = 'LOSS'
-                            break
-                        if candle['high'] >= tp:
-                            metrics['pnl'] = risk_amt * 2.5
-                            metrics['result'] = 'WIN'
-                            break
-                    else:
-                        if candle['high'] >= sl:
-                            metrics['pnl'] = -risk_amt
-                            metrics['result'] = 'LOSS'
-                            break
-                        if candle['low'] <= tp:
-                            metrics['pnl'] = risk_amt * 2.5
-                            metrics['result'] = 'WIN'
-                            break
-                
-                if metrics['result'] != 'OPEN':
-                    equity += metrics['pnl']
-                    trades.append(metrics)
+        # 權益依序累積：每筆風險 2%，盈虧比 1:2.5
+        pnl, outcome, equity = settle_fixed_risk(result, self.initial_capital, 0.02, 2.5)
         
-        return self.calculate_metrics(trades, equity)
+        return self.calculate_metrics(pnl, outcome, equity)
     
     # ==================== Hybrid SFP 回測 ====================
     
@@ -199,91 +160,20 @@ class StatisticalBacktester:
         # 從15m聚合到4h
         df_4h = self.resample_to_4h(df)
         
-        df_4h['ema_200'] = ta.ema(df_4h['close'], length=200)
-        df_4h['rsi'] = ta.rsi(df_4h['close'], length=14)
-        df_4h['atr'] = ta.atr(df_4h['high'], df_4h['low'], df_4h['close'], length=14)
-        df_4h['adx'] = ta.adx(df_4h['high'], df_4h['low'], df_4h['close'], length=14)['ADX_14']
-        
-        bb = ta.bbands(df_4h['close'], length=20, std=2.0)
-        if bb is not None:
-            cols = bb.columns
-            df_4h['bb_upper'] = bb[cols[cols.str.startswith('BBU')][0]]
-            df_4h['bb_lower'] = bb[cols[cols.str.startswith('BBL')][0]]
-            df_4h['bw'] = bb[cols[cols.str.startswith('BBB')][0]]
+        add_sfp_indicators(df_4h)
+        signal, sl, tp, _ = hybrid_sfp_signals(df_4h)
         
-        df_4h['swing_high'] = df_4h['high'].rolling(window=50).max().shift(1)
-        df_4h['swing_low'] = df_4h['low'].rolling(window=50).min().shift(1)
+        # 只取有訊號的 K 線（第 i-1 根為確認收盤的 K 線，從第 i 根開始檢查出場）
+        prev_idx = np.flatnonzero(signal[249:-1]) + 249
+        _, _, result = scan_exits(
+            df_4h['high'].to_numpy(), df_4h['low'].to_numpy(),  # 保留 float32，掃描只需比較
+            prev_idx + 1, signal[prev_idx], sl[prev_idx], tp[prev_idx], 100
+        )
         
-        trades = []
-        equity = self.initial_capital
-        
-        for i in range(250, len(df_4h)):
-            prev = df_4h.iloc[i-1]
-            
-            if pd.isna(prev.get('adx')) or pd.isna(prev.get('rsi')):
-                continue
-            
-            signal = None
-            sl = 0
-            
-            # SFP
-            if prev['adx'] > 30:
-                if prev['high'] > prev['swing_high'] and prev['close'] < prev['swing_high']:
-                    if prev['rsi'] > 60:
-                        signal = 'SHORT'
-                        sl = prev['high']
-                elif prev['low'] < prev['swing_low'] and prev['close'] > prev['swing_low']:
-                    if prev['rsi'] < 40:
-                        signal = 'LONG'
-                        sl = prev['low']
-            
-            # Trend
-            if signal is None and pd.notna(prev.get('bb_upper')):
-                if prev['adx'] > 25:
-                    if prev['close'] > prev['bb_upper'] and prev['close'] > prev['ema_200'] and prev['bw'] > 5.0:
-                        signal = 'LONG'
-                        sl = prev['close'] - (2 * prev['atr'])
-                    elif prev['close'] < prev['bb_lower'] and prev['close'] < prev['ema_200'] and prev['bw'] > 5.0:
-                        signal = 'SHORT'
-                        sl = prev['close'] + (2 * prev['atr'])
-            
-            if signal:
-                risk_amt = equity * 0.02
-                risk_dist = abs(prev['close'] - sl)
-                
-                if risk_dist == 0:
-                    continue
-                
-                tp = prev['close'] + (risk_dist * 2.5) if signal == 'LONG' else prev['close'] - (risk_dist * 2.5)
-                
-                metrics = {'pnl': 0, 'result': 'OPEN'}
-                
-                future = df_4h.iloc[i:i+100]
-                for _, candle in future.iterrows():
-                    if signal == 'LONG':
-                        if candle['low'] <= sl:
-                            metrics['pnl'] = -risk_amt
-                            metrics['result'] = 'LOSS'
-                            break
-                        if candle['high'] >= tp:
-                            metrics['pnl'] = risk_amt * 2.5
-                            metrics['result'] = 'WIN'
-                            break
-                    else:
-                        if candle['high'] >= sl:
-                            metrics['pnl'] = -risk_amt
-                            metrics['result'] = 'LOSS'
-                            break
-                        if candle['low'] <= tp:
-                            metrics['pnl'] = risk_amt * 2.5
-                            metrics['result'] = 'WIN'
-                            break
-                
-                if metrics['result'] != 'OPEN':
-                    equity += metrics['pnl']
-                    trades.append(metrics)
+        # 權益依序累積：每筆風險 2%，盈虧比 1:2.5
+        pnl, outcome, equity = settle_fixed_risk(result, self.initial_capital, 0.02, 2.5)
         
-        return self.calculate_metrics(trades, equity)
+        return self.calculate_metrics(pnl, outcome, equity)
     
     def resample_to_4h(self, df):
         """將15m數據聚合為4h"""
@@ -299,18 +189,17 @@ class StatisticalBacktester:
     
     # ==================== 統計計算 ====================
     
-    def calculate_metrics(self, trades, equity):
-        """計算回測指標"""
-        if not trades:
+    def calculate_metrics(self, pnl, outcome, equity):
+        """計算回測指標（pnl / outcome 為已出場交易的陣列，outcome 1 = WIN、-1 = LOSS）"""
+        if pnl.size == 0:
             return None
         
-        df = pd.DataFrame(trades)
-        total_trades = len(trades)
-        wins = len(df[df['result'] == 'WIN'])
+        total_trades = pnl.size
+        wins = int(np.count_nonzero(outcome > 0))
         win_rate = (wins / total_trades) * 100
         total_return = ((equity - self.initial_capital) / self.initial_capital) * 100
         
-        returns = [t['pnl'] / self.initial_capital for t in trades]
+        returns = pnl / self.initial_capital
         sharpe = (np.mean(returns) / np.std(returns)) * np.sqrt(252) if np.std(returns) > 0 else 0
         
         return {
@@ -341,7 +230,7 @@ class StatisticalBacktester:
     
     # ==================== 主執行流程 ====================
     
-    def run_statistical_test(self, strategy_name, n_samples=20, use_api=False):
+    def run_statistical_test(self, strategy_name, n_samples=20, use_api=False, seed=None):
         """
         執行統計抽樣回測
         
@@ -349,19 +238,25 @@ class StatisticalBacktester:
             strategy_name: 'silver_bullet' or 'hybrid_sfp'
             n_samples: 抽樣數量
             use_api: 是否從 API 抓取（False 則使用本地數據）
+            seed: 抽樣區間的亂數種子（None 時沿用 self.seed）
         """
+        if seed is None:
+            seed = self.seed
+        
         print("=" * 70)
         print(f"統計抽樣回測: {strategy_name}")
         print(f"抽樣數量: {n_samples} 個時間區間（每個3個月）")
         print(f"數據來源: {'幣安 API' if use_api else '本地數據'}")
+        print(f"抽樣種子: {seed}")
         print("="*70)
         
         # 生成時間區間（擴展到 2020-2024）
-        periods = self.generate_sample_periods('2020-01-01', '2024-06-30', n_samples, 3)
+        periods = self.generate_sample_periods('2020-01-01', '2024-06-30', n_samples, 3, seed=seed)
         
-        results = []
         timeframe = '15m' if strategy_name == 'silver_bullet' else '15m'  # Hybrid 也用15m再聚合
         
+        # 階段一：依序取得各區間數據（API 有頻率限制，不並行抓取）
+        samples = []
         for i, period in enumerate(periods):
             print(f"\n區間 {i+1}/{n_samples}: {period['start']} ~ {period['end']}")
             
@@ -375,15 +270,24 @@ class StatisticalBacktester:
                 print("  數據不足，跳過")
                 continue
             
-            # 執行回測
-            if strategy_name == 'silver_bullet':
-                result = self.backtest_silver_bullet(df)
-            else:
-                result = self.backtest_hybrid_sfp(df)
-            
-            if result:
-                results.append(result)
-                print(f"  結果: {result['total_trades']} 筆, 勝率 {result['win_rate']:.1f}%, 回報 {result['total_return']:+.2f}%")
+            samples.append((period, df))
+        
+        # 階段二：各區間回測互相獨立，以進程池並行執行
+        # 所有區間的 OHLCV 一次寫入共享記憶體，worker 直接映射同一塊記憶體，任務只傳區間的列範圍
+        results = []
+        if samples:
+            workers = min(len(samples), os.cpu_count() or 1)
+            shm, layout, bounds = _pack_samples([df for _, df in samples])
+            try:
+                with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.symbol, shm.name, layout)) as pool:
+                    outputs = pool.map(_backtest_worker, [(strategy_name, start, stop) for start, stop in bounds])
+                    for (period, _), result in zip(samples, outputs):
+                        if result:
+                            results.append(result)
+                            print(f"  {period['start']} ~ {period['end']} 結果: {result['total_trades']} 筆, 勝率 {result['win_rate']:.1f}%, 回報 {result['total_return']:+.2f}%")
+            finally:
+                shm.close()
+                shm.unlink()
         
         # 統計分析
         if results:
@@ -394,9 +298,12 @@ class StatisticalBacktester:
     def load_local_data(self, timeframe, start, end):
         """從本地CSV載入數據（用於快速測試）"""
         try:
-            df = pd.read_csv(f'data/backtest/BTC_USDT_{timeframe}_2023-2024.csv')
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            df = self._local_data.get(timeframe)
+            if df is None:
+                df = load_ohlcv(f'data/backtest/BTC_USDT_{timeframe}_2023-2024.csv')
+                self._local_data[timeframe] = df
             
+            # 布林遮罩取出的是新副本，回測加欄位不會汙染共用數據
             mask = (df['timestamp'] >= start) & (df['timestamp'] <= end)
             return df[mask]
         except:
@@ -473,11 +380,75 @@ class StatisticalBacktester:
             f.write(f"穩健性: {consistency:.1f}%\n\n")
             
             # 穩健驗證結果
-            f.write(validator.generate_report(robust_results))
+            validator.write_report(robust_results, f)
         
         print(f"\n📄 報告已保存: {report_path}")
 
 
+# ==================== 共享記憶體 ====================
+
+def _shared_views(buf, layout):
+    """共享記憶體上的 (timestamp, 價量) 陣列視圖：timestamp 在前，其後 5 個價量欄位各自連續"""
+    total, ts_dtype, price_dtype = layout
+    ts = np.ndarray(total, dtype=ts_dtype, buffer=buf)
+    prices = np.ndarray((5, total), dtype=price_dtype, buffer=buf, offset=ts.nbytes)
+    return ts, prices
+
+
+def _pack_samples(frames):
+    """
+    將各區間的 OHLCV 依序寫入同一塊共享記憶體（由呼叫端 close + unlink）
+    
+    Returns:
+        (shm, layout, bounds)：layout 供 worker 重建視圖，bounds 為各區間的 (起, 迄) 列範圍
+    """
+    ts_dtype = np.result_type(*[df['timestamp'].dtype for df in frames])
+    price_dtype = np.result_type(*[df[col].dtype for df in frames for col in OHLCV_COLUMNS])
+    offsets = np.cumsum([0] + [len(df) for df in frames])
+    layout = (int(offsets[-1]), ts_dtype.str, price_dtype.str)
+    
+    nbytes = layout[0] * (ts_dtype.itemsize + 5 * price_dtype.itemsize)
+    shm = SharedMemory(create=True, size=max(nbytes, 1))
+    ts, prices = _shared_views(shm.buf, layout)
+    for df, start, stop in zip(frames, offsets[:-1], offsets[1:]):
+        ts[start:stop] = df['timestamp'].to_numpy(dtype=ts_dtype)
+        prices[:, start:stop] = df[OHLCV_COLUMNS].to_numpy(dtype=price_dtype).T
+    del ts, prices  # 釋放視圖，呼叫端才能 close
+    
+    bounds = [(int(start), int(stop)) for start, stop in zip(offsets[:-1], offsets[1:])]
+    return shm, layout, bounds
+
+
+# 進程池 worker：每個進程持有獨立的回測器（ccxt 客戶端不可跨進程共享）
+_worker_backtester = None
+_worker_shm = None
+_worker_views = None
+
+
+def _init_worker(symbol, shm_name, layout):
+    global _worker_backtester, _worker_shm, _worker_views
+    _worker_backtester = StatisticalBacktester(symbol)
+    # 映射主進程的共享記憶體，整個 worker 生命週期持有（只讀）
+    _worker_shm = SharedMemory(name=shm_name)
+    ts, prices = _shared_views(_worker_shm.buf, layout)
+    ts.flags.writeable = False
+    prices.flags.writeable = False
+    _worker_views = (ts, prices)
+
+
+def _backtest_worker(args):
+    strategy_name, start, stop = args
+    ts, prices = _worker_views
+    # 直接包裝共享記憶體上的切片（不複製）；回測只新增欄位，不改動價量
+    df = pd.DataFrame(
+        {'timestamp': ts[start:stop], **{col: prices[k, start:stop] for k, col in enumerate(OHLCV_COLUMNS)}},
+        copy=False
+    )
+    if strategy_name == 'silver_bullet':
+        return _worker_backtester.backtest_silver_bullet(df)
+    return _worker_backtester.backtest_hybrid_sfp(df)
+
+
 def main():
     backtester = StatisticalBacktester('BTC/USDT')
     
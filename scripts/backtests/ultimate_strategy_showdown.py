@@ -13,9 +13,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
 import pandas as pd
 import numpy as np
-from datetime import datetime
-import ccxt
 from core.position_manager import PositionManager
+from core.backtest_data import download_weekly_btc
 import logging
 
 logging.basicConfig(level=logging.WARNING)
@@ -23,48 +22,9 @@ logger = logging.getLogger(__name__)
 
 
 def download_data():
-    """下載並計算所有指標"""
+    """下載並計算所有指標（共用 core.backtest_data）"""
     print("📥 下載數據並計算指標...")
-    exchange = ccxt.binance()
-    
-    ohlcv = exchange.fetch_ohlcv(
-        'BTC/USDT',
-        timeframe='1w',
-        since=int(datetime(2020, 1, 1).timestamp() * 1000),
-        limit=1000
-    )
-    
-    df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-    df['date'] = pd.to_datetime(df['timestamp'], unit='ms')
-    
-    # 技術指標
-    import pandas_ta as ta
-    df['rsi'] = ta.rsi(df['close'], length=14)
-    df['ma_200w'] = df['close'].rolling(window=200, min_periods=50).mean()
-    
-    # MVRV 代理
-    df['price_ratio'] = df['close'] / df['ma_200w']
-    def ratio_to_mvrv(ratio):
-        if pd.isna(ratio):
-            return 1.0
-        elif ratio < 1.0:
-            return max(0.0, ratio * 1.0)
-        elif ratio < 1.5:
-            return 1.0 + (ratio - 1.0) * 3.0
-        elif ratio < 2.0:
-            return 2.5 + (ratio - 1.5) * 3.0
-        elif ratio < 3.0:
-            return 4.0 + (ratio - 2.0) * 2.5
-        else:
-            return min(10.0, 6.5 + (ratio - 3.0) * 1.5)
-    
-    df['mvrv'] = df['price_ratio'].apply(ratio_to_mvrv)
-    
-    # 簡化的 F&G（用動量推估，真實應該用歷史API）
-    df['momentum'] = df['close'].pct_change(4)  # 4週動量
-    df['fg_proxy'] = 50 + df['momentum'] * 100  # 簡化映射
-    df['fg_proxy'] = df['fg_proxy'].clip(0, 100)
-    
+    df = download_weekly_btc()
     print(f"✅ 完成：{len(df)} 週數據")
     return df
 
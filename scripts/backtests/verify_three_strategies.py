@@ -3,23 +3,52 @@
 清晰的三策略验证回测
 目的：消除混乱，验证当前代码的真实表现
 """
+import sys
+import time
+from pathlib import Path
 import ccxt
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 from datetime import datetime
 
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from core.backtest_kernels import sfp_trend_signals, simulate_close_exits
+from core.indicator_kernels import ema200, rsi14, atr14, adx14, bb50, swing50
+
 print("="*70)
 print("三策略清晰验证回测")
 print("="*70)
 
+CACHE_DIR = Path(__file__).parent.parent.parent / 'data' / 'cache'
+CACHE_MAX_AGE = 3600  # 秒；4h K 線一小時內重跑直接用快取
+
+
+def fetch_ohlcv_cached(exchange, symbol, timeframe, limit):
+    """
+    以 (symbol, timeframe, limit) 為鍵把 OHLCV 存成 Parquet；快取未過期時不呼叫 API
+    """
+    path = CACHE_DIR / f"{symbol.replace('/', '_')}_{timeframe}_{limit}.parquet"
+    if path.exists() and time.time() - path.stat().st_mtime < CACHE_MAX_AGE:
+        return pd.read_parquet(path)
+    
+    ohlcv = exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
+    # 先整批轉成 float64 矩陣再按列切片，省去 list-of-lists 逐列轉型
+    arr = np.asarray(ohlcv, dtype=np.float64).reshape(-1, 6)
+    df = pd.DataFrame({
+        'timestamp': pd.to_datetime(arr[:, 0].astype(np.int64), unit='ms'),
+        'open': arr[:, 1], 'high': arr[:, 2], 'low': arr[:, 3], 'close': arr[:, 4], 'volume': arr[:, 5]
+    })
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    df.to_parquet(path, compression='snappy', index=False)
+    return df
+
+
 # 初始化
 exchange = ccxt.binance()
 
 # 获取 BTC 数据（2024年至今）
 print("\n📥 獲取 BTC 數據...")
-ohlcv = exchange.fetch_ohlcv('BTC/USDT', '4h', limit=1000)
-df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
-df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+df = fetch_ohlcv_cached(exchange, 'BTC/USDT', '4h', 1000)
 
 print(f"📊 數據範圍: {df['timestamp'].iloc[0]} 到 {df['timestamp'].iloc[-1]}")
 print(f"📊 總K線數: {len(df)}")
@@ -29,102 +58,37 @@ print("\n" + "="*70)
 print("策略 1: Hybrid SFP (strategies/hybrid_sfp.py)")
 print("="*70)
 
-# 计算指标
-df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=14)
-df['rsi'] = ta.rsi(df['close'], length=14)
-adx_df = ta.adx(df['high'], df['low'], df['close'], length=14)
-if adx_df is not None:
-    df['adx'] = adx_df.iloc[:, 0]
-bb = ta.bbands(df['close'], length=50, std=2.0)
-if bb is not None:
-    df['bb_upper'] = bb.iloc[:, 0]
-    df['bb_lower'] = bb.iloc[:, 2]
-    df['bw'] = bb.iloc[:, 1]
-df['ema200'] = ta.ema(df['close'], length=200)
-df['swing_high'] = df['high'].rolling(window=50).max().shift(1)
-df['swing_low'] = df['low'].rolling(window=50).min().shift(1)
-
-# 回测
-balance = 10000
-trades = []
-position = None
-
-for i in range(210, len(df)-1):
-    row = df.iloc[i]
-    
-    # 检查信号（根据 hybrid_sfp.py 逻辑）
-    signal = None
-    if pd.notna(row.get('adx')) and row['adx'] > 30:
-        # SFP 做空
-        if (row['high'] > row['swing_high'] and 
-            row['close'] < row['swing_high'] and 
-            row['rsi'] > 60):
-            signal = 'SHORT'
-            sl = row['high']
-        # SFP 做多
-        elif (row['low'] < row['swing_low'] and 
-              row['close'] > row['swing_low'] and 
-              row['rsi'] < 40):
-            signal = 'LONG'
-            sl = row['low']
-    
-    # 趋势突破
-    if signal is None and pd.notna(row.get('adx')) and row['adx'] > 25:
-        if (row['close'] > row['bb_upper'] and 
-            row['close'] > row['ema200'] and 
-            pd.notna(row.get('bw')) and row['bw'] > 5):
-            signal = 'LONG'
-            sl = row['close'] - (2 * row['atr'])
-        elif (row['close'] < row['bb_lower'] and 
-              row['close'] < row['ema200'] and 
-              pd.notna(row.get('bw')) and row['bw'] > 5):
-            signal = 'SHORT'
-            sl = row['close'] + (2 * row['atr'])
-    
-    # 执行交易
-    if signal and position is None:
-        entry = df.iloc[i+1]['open']
-        dist = abs(entry - sl)
-        tp = entry + (dist * 2.5) if signal == 'LONG' else entry - (dist * 2.5)
-        
-        position = {
-            'type': signal,
-            'entry': entry,
-            'sl': sl,
-            'tp': tp,
-            'size': (balance * 0.02) / dist
-        }
-    
-    # 检查止损止盈
-    if position:
-        current = row['close']
-        pnl = 0
-        
-        if position['type'] == 'LONG':
-            if current >= position['tp']:
-                pnl = (position['tp'] - position['entry']) * position['size']
-                trades.append({'pnl': pnl, 'result': 'WIN'})
-                position = None
-            elif current <= position['sl']:
-                pnl = (position['sl'] - position['entry']) * position['size']
-                trades.append({'pnl': pnl, 'result': 'LOSS'})
-                position = None
-        else:  # SHORT
-            if current <= position['tp']:
-                pnl = (position['entry'] - position['tp']) * position['size']
-                trades.append({'pnl': pnl, 'result': 'WIN'})
-                position = None
-            elif current >= position['sl']:
-                pnl = (position['entry'] - position['sl']) * position['size']
-                trades.append({'pnl': pnl, 'result': 'LOSS'})
-                position = None
-        
-        balance += pnl
+# 计算指标：與實盤 HybridSFPStrategy 共用 Numba 指標核心，直接輸出 NumPy 陣列
+# （不改用 requirements 中的 TA-Lib：其 RSI / ATR / ADX 以 SMA 為平滑種子，暖機期數值與 pandas_ta 及實盤不同）
+high = df['high'].to_numpy(dtype=np.float64)
+low = df['low'].to_numpy(dtype=np.float64)
+close = df['close'].to_numpy(dtype=np.float64)
+
+atr = atr14(high, low, close)
+rsi = rsi14(close)
+adx = adx14(high, low, close)
+bb_lower, _, bb_upper, bw = bb50(close)
+ema = ema200(close)
+swing_high, swing_low = swing50(high, low)  # 前 50 根高低點，一次遍歷同時算出
+
+# 信号（根据 hybrid_sfp.py 逻辑）：所有條件在 Numba 核心內逐根一次判定，不產生中間布林陣列
+signal, stop = sfp_trend_signals(high, low, close, adx, rsi, swing_high, swing_low, bb_upper, bb_lower, bw, ema, atr)
+
+# 回测：只傳入有信号的 K 线，逐筆進出場由 Numba 核心完成
+last = len(df) - 1
+candidates = np.flatnonzero(signal)
+candidates = candidates[(candidates >= 210) & (candidates < last)]
+
+pnl, outcome, balance = simulate_close_exits(
+    df['open'].to_numpy(dtype=np.float64), close,
+    candidates, signal[candidates], stop[candidates],
+    last, 10000.0, 0.02, 2.5
+)
 
 # 统计
-if trades:
-    wins = len([t for t in trades if t['result'] == 'WIN'])
-    total = len(trades)
+if pnl.size:
+    wins = int((outcome > 0).sum())
+    total = pnl.size
     win_rate = wins / total * 100
     total_return = (balance - 10000) / 10000 * 100
     
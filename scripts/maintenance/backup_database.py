@@ -2,15 +2,16 @@
 # tools/backup_database.py
 """
 資料庫自動備份腳本
-每天自動備份 trading.db，保留最近 30 天
+每天自動備份 trading.db（zstd 壓縮為 .db.zst），保留最近 30 天
+還原：zstd -d trading_YYYYmmdd_HHMMSS.db.zst
 """
 
-import shutil
+import sqlite3
 import os
+from contextlib import closing
 from datetime import datetime, timedelta
-from pathlib import Path
-import schedule
 import time
+import zstandard as zstd
 
 
 def backup_database(db_path='data/trading.db', backup_dir='data/backups'):
@@ -32,13 +33,14 @@ def backup_database(db_path='data/trading.db', backup_dir='data/backups'):
         
         # 生成備份文件名
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        backup_file = os.path.join(backup_dir, f'trading_{timestamp}.db')
+        backup_file = os.path.join(backup_dir, f'trading_{timestamp}.db.zst')
         
-        # 複製資料庫
-        shutil.copy2(db_path, backup_file)
+        # 複製並壓縮資料庫（持有讀鎖，不與寫入競爭）
+        copy_database(db_path, backup_file)
         
         file_size = os.path.getsize(backup_file) / 1024 / 1024  # MB
-        print(f"✅ 資料庫已備份: {backup_file} ({file_size:.2f} MB)")
+        db_size = os.path.getsize(db_path) / 1024 / 1024
+        print(f"✅ 資料庫已備份: {backup_file} ({file_size:.2f} MB，原始 {db_size:.2f} MB)")
         
         # 清理舊備份
         cleanup_old_backups(backup_dir, days=30)
@@ -47,6 +49,39 @@ def backup_database(db_path='data/trading.db', backup_dir='data/backups'):
         print(f"❌ 備份失敗: {e}")
 
 
+def copy_database(db_path, backup_file):
+    """
+    取得一致的資料庫快照並以 zstd 壓縮寫入 backup_file
+    - rollback journal 模式：持有讀鎖期間其他連線無法提交，主檔即為完整快照，直接串流壓縮
+      （備份檔的 mtime 為備份時間，清理舊備份時據此計算天數）
+    - WAL 模式：已提交的資料可能仍在 -wal 檔，先以 SQLite 線上備份 API 匯出暫存檔再壓縮
+    """
+    with closing(sqlite3.connect(db_path)) as src:
+        journal_mode = src.execute('PRAGMA journal_mode').fetchone()[0]
+        if journal_mode.lower() == 'wal':
+            tmp_file = backup_file + '.tmp'
+            with closing(sqlite3.connect(tmp_file)) as dst:
+                src.backup(dst)
+            try:
+                compress_file(tmp_file, backup_file)
+            finally:
+                os.remove(tmp_file)
+            return
+        
+        src.execute('BEGIN')
+        src.execute('SELECT count(*) FROM sqlite_master').fetchone()  # 取得讀鎖
+        try:
+            compress_file(db_path, backup_file)
+        finally:
+            src.rollback()
+
+
+def compress_file(src_path, dst_path, level=3):
+    """zstd 串流壓縮（多執行緒；SQLite 檔通常可縮小 3-5 倍）"""
+    with open(src_path, 'rb') as src, open(dst_path, 'wb') as dst:
+        zstd.ZstdCompressor(level=level, threads=-1).copy_stream(src, dst)
+
+
 def cleanup_old_backups(backup_dir, days=30):
     """
     清理超過指定天數的備份
@@ -56,16 +91,20 @@ def cleanup_old_backups(backup_dir, days=30):
         days: 保留天數
     """
     try:
-        cutoff_date = datetime.now() - timedelta(days=days)
+        cutoff = (datetime.now() - timedelta(days=days)).timestamp()
         deleted_count = 0
         
-        for file in Path(backup_dir).glob('trading_*.db'):
-            file_time = datetime.fromtimestamp(file.stat().st_mtime)
-            
-            if file_time < cutoff_date:
-                file.unlink()
-                deleted_count += 1
-                print(f"🗑️ 刪除舊備份: {file.name}")
+        # scandir 的 DirEntry 在讀目錄時已帶回檔案資訊，不必逐檔再 stat
+        with os.scandir(backup_dir) as it:
+            for entry in it:
+                # 含舊版未壓縮的 .db
+                if not (entry.name.startswith('trading_') and entry.name.endswith(('.db', '.db.zst'))):
+                    continue
+                
+                if entry.stat().st_mtime < cutoff:
+                    os.unlink(entry.path)
+                    deleted_count += 1
+                    print(f"🗑️ 刪除舊備份: {entry.name}")
         
         if deleted_count > 0:
             print(f"✅ 清理完成，刪除了 {deleted_count} 個舊備份")
@@ -74,13 +113,22 @@ def cleanup_old_backups(backup_dir, days=30):
         print(f"❌ 清理備份失敗: {e}")
 
 
-def run_backup_scheduler():
+def seconds_until(hour, minute=0):
+    """距離下一次 hour:minute（本地時間）的秒數；今天已過則算到明天"""
+    now = datetime.now()
+    next_run = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if next_run <= now:
+        next_run += timedelta(days=1)
+    return (next_run - now).total_seconds()
+
+
+def run_backup_scheduler(hour=3):
     """
     運行備份排程器
-    每天凌晨 3 點自動備份
+    每天凌晨 hour 點（預設 3 點）自動備份
     """
     print("🕐 資料庫備份排程器已啟動")
-    print("   每天 03:00 自動備份")
+    print(f"   每天 {hour:02d}:00 自動備份")
     print("   保留最近 30 天的備份")
     print()
     
@@ -89,13 +137,10 @@ def run_backup_scheduler():
     backup_database()
     print()
     
-    # 排程每天凌晨 3 點
-    schedule.every().day.at("03:00").do(backup_database)
-    
-    # 持續運行
+    # 持續運行：直接睡到下一次凌晨 3 點，每天只喚醒一次
     while True:
-        schedule.run_pending()
-        time.sleep(60)  # 每分鐘檢查一次
+        time.sleep(seconds_until(hour))
+        backup_database()
 
 
 if __name__ == "__main__":
@@ -2,8 +2,35 @@
 import google.generativeai as genai
 import json
 import os
+import sys
+import time
+from pathlib import Path
 
-def check():
+# list_models() 每次都是一趟 HTTPS 往返；模型清單很少變動，快取 24 小時
+CACHE_FILE = Path.home() / '.cache' / 'ai-crypto-bot' / 'gemini_models.json'
+CACHE_TTL = 24 * 3600  # 秒
+
+def _cached_list_models(refresh=False):
+    """
+    genai.list_models() 的磁碟快取：快取檔未過期時直接讀取，否則呼叫 API 並覆寫
+    
+    Returns:
+        [{'name': ..., 'supported_generation_methods': [...]}, ...]
+    """
+    if not refresh and CACHE_FILE.exists() and time.time() - CACHE_FILE.stat().st_mtime < CACHE_TTL:
+        with open(CACHE_FILE, 'r') as f:
+            return json.load(f)
+    
+    models = [
+        {'name': m.name, 'supported_generation_methods': list(m.supported_generation_methods)}
+        for m in genai.list_models()
+    ]
+    CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    with open(CACHE_FILE, 'w') as f:
+        json.dump(models, f)
+    return models
+
+def check(refresh=False):
     print("🔍 正在查詢可用模型清單...")
     
     # 1. 讀取 API Key
@@ -24,10 +51,10 @@ def check():
         found = False
         print("\n📋 Google 回傳的可用模型:")
         print("-" * 30)
-        for m in genai.list_models():
+        for m in _cached_list_models(refresh):
             # 我們只關心能「產生內容 (generateContent)」的模型
-            if 'generateContent' in m.supported_generation_methods:
-                print(f"✅ {m.name}")
+            if 'generateContent' in m['supported_generation_methods']:
+                print(f"✅ {m['name']}")
                 found = True
         print("-" * 30)
         
@@ -38,4 +65,5 @@ def check():
         print(f"❌ 查詢失敗: {e}")
 
 if __name__ == "__main__":
-    check()
\ No newline at end of file
+    # --refresh：略過快取，重新向 API 查詢
+    check(refresh='--refresh' in sys.argv)
\ No newline at end of file
@@ -4,89 +4,103 @@
 檢查近期行情是否觸發交易信號
 """
 
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 from datetime import datetime, timedelta
 import sys
 import os
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 from tools.smc_detector import SMCDetector
+from core.backtest_signals import add_sweep_levels
 
 
 def check_silver_bullet_signals(df):
-    """檢查 Silver Bullet 信號"""
-    df['ema_200'] = ta.ema(df['close'], length=200)
+    """
+    檢查 Silver Bullet 信號
+    - 時段、掃蕩形態、EMA 200 方向整段以陣列遮罩一次判定
+    - 只對掃蕩成立的 K 線建立記錄（依時間排序，同一根 LONG 在前）
+    """
+    add_sweep_levels(df)  # EMA 200 + 前 4 根（1 小時）高低點
+    
+    low = df['low'].to_numpy(dtype=np.float64)
+    high = df['high'].to_numpy(dtype=np.float64)
+    close = df['close'].to_numpy(dtype=np.float64)
+    ema = df['ema_200'].to_numpy(dtype=np.float64)
+    lh_low = df['lh_low'].to_numpy(dtype=np.float64)
+    lh_high = df['lh_high'].to_numpy(dtype=np.float64)
+    
+    # 時段檢查（UTC）
+    hour = df['timestamp'].dt.hour.to_numpy()
+    in_session = ((hour >= 2) & (hour < 5)) | ((hour >= 10) & (hour < 11))
+    
+    # 掃蕩形態（前 210 根為指標暖機期，不檢查）
+    long_sweep = (low < lh_low) & (close > lh_low)
+    short_sweep = (high > lh_high) & (close < lh_high)
+    long_sweep[:210] = False
+    short_sweep[:210] = False
     
     signals = []
     near_signals = []
+    timestamps = df['timestamp']
     
-    for i in range(210, len(df)):
-        current = df.iloc[i]
-        prev_hour = df.iloc[i-4:i]
-        
-        # 時段檢查（UTC）
-        hour = current['timestamp'].hour
-        in_session = (2 <= hour < 5) or (10 <= hour < 11)
-        
-        # 掃蕩形態
-        lh_low = prev_hour['low'].min()
-        lh_high = prev_hour['high'].max()
+    for i in np.flatnonzero(long_sweep | short_sweep):
+        time_i = timestamps.iloc[i]
         
         # LONG 信號
-        if current['low'] < lh_low and current['close'] > lh_low:
-            if current['close'] > current['ema_200']:
-                if in_session:
+        if long_sweep[i]:
+            if close[i] > ema[i]:
+                if in_session[i]:
                     signals.append({
-                        'time': current['timestamp'],
+                        'time': time_i,
                         'type': 'LONG',
-                        'price': current['close'],
+                        'price': close[i],
                         'reason': '掃蕩低點 + EMA200上方 + 時段正確',
-                        'ema': current['ema_200']
+                        'ema': ema[i]
                     })
                 else:
                     near_signals.append({
-                        'time': current['timestamp'],
+                        'time': time_i,
                         'type': 'LONG',
-                        'price': current['close'],
+                        'price': close[i],
                         'reason': '掃蕩低點 + EMA200上方，但時段不對',
                         'missing': '非交易時段'
                     })
             else:
                 near_signals.append({
-                    'time': current['timestamp'],
+                    'time': time_i,
                     'type': 'LONG',
-                    'price': current['close'],
+                    'price': close[i],
                     'reason': '掃蕩低點，但收盤在 EMA200 下方',
-                    'missing': f'EMA200: {current["ema_200"]:.2f}, Close: {current["close"]:.2f}'
+                    'missing': f'EMA200: {ema[i]:.2f}, Close: {close[i]:.2f}'
                 })
         
         # SHORT 信號
-        if current['high'] > lh_high and current['close'] < lh_high:
-            if current['close'] < current['ema_200']:
-                if in_session:
+        if short_sweep[i]:
+            if close[i] < ema[i]:
+                if in_session[i]:
                     signals.append({
-                        'time': current['timestamp'],
+                        'time': time_i,
                         'type': 'SHORT',
-                        'price': current['close'],
+                        'price': close[i],
                         'reason': '掃蕩高點 + EMA200下方 + 時段正確',
-                        'ema': current['ema_200']
+                        'ema': ema[i]
                     })
                 else:
                     near_signals.append({
-                        'time': current['timestamp'],
+                        'time': time_i,
                         'type': 'SHORT',
-                        'price': current['close'],
+                        'price': close[i],
                         'reason': '掃蕩高點 + EMA200下方，但時段不對',
                         'missing': '非交易時段'
                     })
             else:
                 near_signals.append({
-                    'time': current['timestamp'],
+                    'time': time_i,
                     'type': 'SHORT',
-                    'price': current['close'],
+                    'price': close[i],
                     'reason': '掃蕩高點，但收盤在 EMA200 上方',
-                    'missing': f'EMA200: {current["ema_200"]:.2f}, Close: {current["close"]:.2f}'
+                    'missing': f'EMA200: {ema[i]:.2f}, Close: {close[i]:.2f}'
                 })
     
     return signals, near_signals
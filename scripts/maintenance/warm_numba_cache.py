@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# scripts/maintenance/warm_numba_cache.py
+"""
+預先編譯 Numba 核心並寫入磁碟快取
+- 核心皆為 @njit(cache=True)：首次呼叫時編譯，結果寫入 NUMBA_CACHE_DIR（未設定時為原始碼旁的 __pycache__）
+- 建置映像或部署後執行一次，之後的回測與實盤直接載入編譯結果，不再有 JIT 暖機
+- 以實際使用的型別各呼叫一次：K 線價格 float64 與 float32（本地回測數據）、可寫與唯讀陣列
+  （pandas 的 to_numpy() 在 Copy-on-Write 下回傳唯讀陣列，Numba 視為不同簽名）
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from numba import config
+
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from core import backtest_kernels as bk
+from core.indicator_kernels import ema200, rsi14, atr14, adx14, bb20, bb50, swing50
+
+
+def _sample_bars(n=300, readonly=False):
+    """產生 n 根模擬 K 線（只用來觸發編譯，數值不重要）"""
+    rng = np.random.default_rng(0)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    bars = (close * 1.01, close * 0.99, close)
+    for arr in bars:
+        arr.setflags(write=not readonly)
+    return bars
+
+
+def warm(readonly=False):
+    high, low, close = _sample_bars(readonly=readonly)
+
+    # 指標核心（實盤 HybridSFPStrategy 與回測共用）
+    ema = ema200(close)
+    rsi = rsi14(close)
+    atr = atr14(high, low, close)
+    adx = adx14(high, low, close)
+    bb20(close)
+    bb_lower, _, bb_upper, bw = bb50(close)
+    swing_high, swing_low = swing50(high, low)
+
+    # verify_three_strategies
+    signal, stop = bk.sfp_trend_signals(
+        high, low, close, adx, rsi, swing_high, swing_low, bb_upper, bb_lower, bw, ema, atr
+    )
+    idx = np.arange(210, 290, 10)
+    bk.simulate_close_exits(close, close, idx, signal[idx], close[idx] * 0.98, len(close) - 1, 1000.0, 0.02, 2.5)
+
+    # final_system_backtest / statistical_backtest：API 數據為 float64，本地數據為 float32
+    side = np.where(idx % 20 == 0, 1, -1)
+    sl = close[idx] * (1 - 0.02 * side)
+    tp = close[idx] * (1 + 0.05 * side)
+    for dtype in (np.float64, np.float32):
+        for scan in (bk.scan_exits, bk.scan_exits_parallel):
+            h, l = high.astype(dtype), low.astype(dtype)
+            h.setflags(write=not readonly)
+            l.setflags(write=not readonly)
+            _, _, result = scan(h, l, idx + 1, side, sl, tp, 100)
+    bk.settle_fixed_risk(result, 1000.0, 0.02, 2.5)
+
+
+def main():
+    print("🔧 預先編譯 Numba 核心...")
+    start = time.perf_counter()
+    warm(readonly=False)
+    warm(readonly=True)
+    print(f"✅ 完成（{time.perf_counter() - start:.1f} 秒），快取位置: {config.CACHE_DIR or '原始碼旁的 __pycache__'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -13,6 +13,7 @@ class DynamicSymbolSelector:
         self.config_file = config_file
         self.cache_duration = 168  # 小時（每週更新一次 = 7天）
         self.coingecko_api = "https://api.coingecko.com/api/v3"
+        self._markets = None  # Binance 交易對，首次檢查時載入一次
         
     def get_top_symbols(self, top_n=15, exclude=['USDT', 'USDC', 'BUSD', 'DAI'], verbose=False):
         """
@@ -86,12 +87,12 @@ class DynamicSymbolSelector:
             return self._get_fallback_symbols()
     
     def _check_binance_availability(self, symbol):
-        """檢查幣種在 Binance 是否可交易"""
+        """檢查幣種在 Binance 是否可交易（交易對清單只下載一次，之後的幣種直接查表）"""
         try:
-            import ccxt
-            exchange = ccxt.binance()
-            markets = exchange.load_markets()
-            return symbol in markets
+            if self._markets is None:
+                import ccxt
+                self._markets = ccxt.binance().load_markets()
+            return symbol in self._markets
         except:
             # 如果檢查失敗，假設可用（降級處理）
             return True
@@ -5,18 +5,31 @@
 基于量化指标 + AI 分析，每周自动评估和更新监控币种
 """
 
-import ccxt
-import pandas as pd
+import os
+import threading
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-import json
+import orjson
 
 
 class DynamicSymbolSelector:
     """动态币种选择器"""
     
+    # 综合评分指标与权重（顺序一一对应）
+    SCORE_KEYS = ('vol_score', 'volume_score', 'trend_score', 'performance_score', 'stability_score')
+    SCORE_WEIGHTS = np.array([
+        0.25,  # 波动率 25%
+        0.30,  # 流动性 30%（最重要）
+        0.20,  # 趋势 20%
+        0.15,  # 表现 15%
+        0.10,  # 稳定性 10%
+    ])
+    
     def __init__(self, top_n=30, select_n=5):
+        import ccxt  # 延遲載入：ccxt 註冊上百個交易所，import 成本高
         self.exchange = ccxt.binance()
+        self._thread_local = threading.local()  # 并发检查时每个线程各自的客户端
         self.top_n = top_n  # 评估前 N 名
         self.select_n = select_n  # 选择 N 个币种
     
@@ -33,27 +46,43 @@ class DynamicSymbolSelector:
         ]
         
         # 过滤：確保有 4h K線和永續合約
-        valid_symbols = []
-        for symbol in candidates:
-            try:
-                # 测试是否能获取数据
-                self.exchange.fetch_ohlcv(symbol, '4h', limit=5)
-                valid_symbols.append(symbol)
-            except:
-                continue
+        # 每个币种一次独立的 HTTP 请求，以线程并发等待网络（map 保持原顺序）
+        # 同步 ccxt 客户端的 session 与限速状态不可跨线程共用，每个线程各建一个
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            available = list(pool.map(self._has_ohlcv, candidates))
         
+        valid_symbols = [symbol for symbol, ok in zip(candidates, available) if ok]
         return valid_symbols[:self.top_n]
     
+    def _thread_exchange(self):
+        """目前线程专用的 ccxt 客户端（首次使用时建立）"""
+        exchange = getattr(self._thread_local, 'exchange', None)
+        if exchange is None:
+            import ccxt
+            exchange = ccxt.binance()
+            self._thread_local.exchange = exchange
+        return exchange
+    
+    def _has_ohlcv(self, symbol):
+        """测试是否能获取数据（在线程池中执行）"""
+        try:
+            self._thread_exchange().fetch_ohlcv(symbol, '4h', limit=5)
+            return True
+        except:
+            return False
+    
     def calculate_metrics(self, symbol, days=30):
         """计算币种评分指标"""
         try:
             # 获取历史数据
             ohlcv = self.exchange.fetch_ohlcv(symbol, '4h', limit=days*6)
-            df = pd.DataFrame(ohlcv, columns=['timestamp', 'open', 'high', 'low', 'close', 'volume'])
+            # 直接转为数组按列索引，省去 DataFrame 构建开销
+            arr = np.asarray(ohlcv, dtype=np.float64)
+            high, low, close, volume = arr[:, 2], arr[:, 3], arr[:, 4], arr[:, 5]
             
             # 1. 波动率评分（60-100% 最佳）
-            returns = df['close'].pct_change()
-            volatility = returns.std() * np.sqrt(365*6) * 100  # 年化波动率
+            returns = np.diff(close) / close[:-1]
+            volatility = returns.std(ddof=1) * np.sqrt(365*6) * 100  # 年化波动率
             
             if 60 <= volatility <= 100:
                 vol_score = 100
@@ -63,21 +92,26 @@ class DynamicSymbolSelector:
                 vol_score = max(0, 100 - (volatility - 100) / 2)
             
             # 2. 流动性评分（交易量）
-            avg_volume = df['volume'].mean()
+            avg_volume = volume.mean()
             volume_score = min(100, (avg_volume / 1e7) * 10)  # 归一化
             
             # 3. 趋势强度评分（ADX 概念）
-            high_low_range = (df['high'] - df['low']).mean()
-            trend_score = min(100, (high_low_range / df['close'].mean()) * 1000)
+            high_low_range = (high - low).mean()
+            trend_score = min(100, (high_low_range / close.mean()) * 1000)
             
             # 4. 近期表现（过去 7 天收益）
-            recent_return = (df['close'].iloc[-1] / df['close'].iloc[-42] - 1) * 100  # 7天
+            # 7天 = 42 根 4h K 線；歷史不足時 IndexError，該幣種不列入評估
+            recent_return = (close[-1] / close[-42] - 1) * 100
             performance_score = 50 + recent_return * 2  # 中心化到 50
             performance_score = max(0, min(100, performance_score))
             
             # 5. 价格稳定性（避免暴涨暴跌）
-            price_changes = df['close'].pct_change().abs()
-            max_daily_change = price_changes.nlargest(5).mean()  # 前5大波动平均
+            price_changes = np.abs(returns)
+            top_k = min(5, price_changes.size)
+            if top_k <= 0:
+                raise ValueError("K 線不足，無法計算價格穩定性")
+            # np.partition 为 O(N) 选择，无需完整排序
+            max_daily_change = np.partition(price_changes, -top_k)[-top_k:].mean()  # 前5大波动平均
             stability_score = max(0, 100 - max_daily_change * 500)
             
             return {
@@ -97,25 +131,19 @@ class DynamicSymbolSelector:
     
     def rank_symbols(self, metrics_list):
         """综合评分并排名"""
-        # 权重配置
-        weights = {
-            'vol_score': 0.25,        # 波动率 25%
-            'volume_score': 0.30,     # 流动性 30%（最重要）
-            'trend_score': 0.20,      # 趋势 20%
-            'performance_score': 0.15, # 表现 15%
-            'stability_score': 0.10    # 稳定性 10%
-        }
+        if not metrics_list:
+            return metrics_list
+        
+        # 评分矩阵 (N 币种 × 5 指标) 与权重向量做一次点积
+        scores = np.array([[m[key] for key in self.SCORE_KEYS] for m in metrics_list], dtype=np.float64)
+        totals = np.round(scores @ self.SCORE_WEIGHTS, 2)
         
-        for metrics in metrics_list:
-            total_score = sum(
-                metrics[key] * weight 
-                for key, weight in weights.items()
-            )
-            metrics['total_score'] = round(total_score, 2)
+        for metrics, total_score in zip(metrics_list, totals):
+            metrics['total_score'] = float(total_score)
         
-        # 排序
-        metrics_list.sort(key=lambda x: x['total_score'], reverse=True)
-        return metrics_list
+        # 排序（稳定排序，同分保持原顺序）
+        order = np.argsort(-totals, kind='stable')
+        return [metrics_list[i] for i in order]
     
     def select_top_symbols(self, ranked_metrics):
         """选择 Top N 币种"""
@@ -170,8 +198,9 @@ class DynamicSymbolSelector:
             'metrics': selected_symbols
         }
         
-        with open(filename, 'w') as f:
-            json.dump(config, f, indent=2)
+        # 指標值為 numpy 浮點數，由 orjson 原生序列化
+        with open(filename, 'wb') as f:
+            f.write(orjson.dumps(config, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
         
         print(f"\n✅ 配置已保存到: {filename}")
     
@@ -186,10 +215,12 @@ class DynamicSymbolSelector:
         # 2. 计算指标
         print(f"⏳ 分析币种指标...")
         metrics_list = []
-        for symbol in candidates:
-            metrics = self.calculate_metrics(symbol)
-            if metrics:
-                metrics_list.append(metrics)
+        if candidates:
+            workers = min(len(candidates), os.cpu_count() or 1)
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+                for metrics in pool.map(_calculate_metrics_worker, candidates):
+                    if metrics:
+                        metrics_list.append(metrics)
         
         # 3. 排名
         ranked = self.rank_symbols(metrics_list)
@@ -207,6 +238,19 @@ class DynamicSymbolSelector:
         return [m['symbol'] for m in selected]
 
 
+# 进程池 worker：每个进程持有独立的选择器（ccxt 客户端不可跨进程共享）
+_worker_selector = None
+
+
+def _init_worker():
+    global _worker_selector
+    _worker_selector = DynamicSymbolSelector()
+
+
+def _calculate_metrics_worker(symbol):
+    return _worker_selector.calculate_metrics(symbol)
+
+
 if __name__ == "__main__":
     selector = DynamicSymbolSelector(top_n=30, select_n=5)
     selected_symbols = selector.run()
@@ -1,11 +1,13 @@
 # strategies/silver_bullet.py
 import time
 import sys
+import numpy as np
 import pandas as pd
 from datetime import datetime
-import pytz
-import pandas_ta as ta
+from zoneinfo import ZoneInfo
 from core.persistence import StateManager
+from core.indicators_fast import ema_last
+from core.indicator_kernels import atr14
 from tools.smc_detector import SMCDetector
 
 class SilverBulletStrategy:
@@ -19,11 +21,19 @@ class SilverBulletStrategy:
         self.daily_trade_limit = 1      # 每天只做一單 (防止過度交易)
         self.max_leverage = 10          # 最大槓桿
         
+        # 紐約時區只建立一次；日期字串僅在跨日時重新格式化
+        self._ny_tz = ZoneInfo('America/New_York')
+        self._ny_date_cached = None
+        self._ny_date_str = None
+        
         # SMC 改為加碼機制（而非過濾）
         self.smc = SMCDetector(atr_multiplier=1.2, lookback=30)
         self.use_smc_boost = True           # 啟用 SMC 加碼
         self.smc_boost_multiplier = 1.5     # SMC 確認時倉位 +50%
         self.base_position_pct = 0.02       # 基礎倉位 2%
+        # SMC 結果快取：symbol -> (最新 K 線時間, order_blocks, fvgs)
+        # Order Block 只在新 K 線出現時改變，同一根 K 線內重複掃描可直接沿用
+        self._smc_cache = {}
         
         # 狀態追蹤 (改用 StateManager)
         self.state_manager = StateManager()
@@ -38,14 +48,16 @@ class SilverBulletStrategy:
 
     def get_ny_time(self):
         """獲取當前紐約時間"""
-        utc_now = datetime.now(pytz.utc)
-        ny_tz = pytz.timezone('America/New_York')
-        return utc_now.astimezone(ny_tz)
+        return datetime.now(self._ny_tz)
 
     def check_session(self):
         """檢查交易時段與每日限制"""
         ny_time = self.get_ny_time()
-        today_str = ny_time.strftime('%Y-%m-%d')
+        ny_date = ny_time.date()
+        if ny_date != self._ny_date_cached:
+            self._ny_date_cached = ny_date
+            self._ny_date_str = ny_time.strftime('%Y-%m-%d')
+        today_str = self._ny_date_str
         
         # 1. 重置每日計數
         if self.last_trade_date != today_str:
@@ -120,22 +132,31 @@ class SilverBulletStrategy:
             df = await self.exec.fetch_ohlcv(limit=300)
             if df is None: continue
 
-            # 計算 EMA 200 (趨勢濾網)
-            df['ema_200'] = ta.ema(df['close'], length=200)
-            
-            # 計算 ATR（SMC 需要）
-            df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=14)
+            # 計算 EMA 200 (趨勢濾網) - 只需要最新值
+            ema_val = ema_last(df['close'].to_numpy(), 200)
             
-            # SMC 掃描（用於加碼判斷）
+            # SMC 掃描（用於加碼判斷），ATR 只有 Order Block 需要
+            # Order Block 不含最後 5 根，同一根 K 線內結果不變，依幣種快取；FVG 含未收盤 K 線，每次重算
             if self.use_smc_boost:
-                self.smc.scan(df)
+                last_bar_ts = df['timestamp'].iloc[-1]
+                cached = self._smc_cache.get(symbol)
+                if cached is not None and cached[0] == last_bar_ts:
+                    self.smc.order_blocks = cached[1]
+                else:
+                    df['atr'] = atr14(
+                        df['high'].to_numpy(dtype=np.float64), df['low'].to_numpy(dtype=np.float64), df['close'].to_numpy(dtype=np.float64)
+                    )
+                    self.smc.scan_order_blocks(df)
+                    self._smc_cache[symbol] = (last_bar_ts, self.smc.order_blocks)
+                self.smc.scan_fvgs(df)
             
             # 3. 檢查形態 (Liquidity Sweep)
             # 取過去 1 小時的高低點
-            last_hour_high = df['high'].iloc[-5:-1].max()
-            last_hour_low = df['low'].iloc[-5:-1].min()
+            high = df['high'].to_numpy()
+            low = df['low'].to_numpy()
+            last_hour_high = high[-5:-1].max()
+            last_hour_low = low[-5:-1].min()
             current = df.iloc[-1]
-            ema_val = current['ema_200']
             
             # 如果 EMA 剛開始計算還沒有值，先跳過
             if pd.isna(ema_val): continue
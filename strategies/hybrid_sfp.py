@@ -1,13 +1,26 @@
 # strategies/hybrid_sfp.py
+import numpy as np
 import pandas as pd
-# 使用 ta 庫（已安裝）替代 pandas_ta
-import ta
 import time
 import sys
 from datetime import datetime
 from core.persistence import StateManager
+from core.indicator_kernels import make_kernel
 
 class HybridSFPStrategy:
+    OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+    BUF_SIZE = 256          # 每個幣種保留的 K 線數（>= 200 EMA + 50 Rolling）
+    FULL_LIMIT = 250        # 冷啟動 / 斷檔時抓取的完整歷史
+    INCREMENTAL_LIMIT = 5   # 緩衝區已就緒時只抓最新幾根
+    
+    # 指標週期（固定常數，對應 core.indicator_kernels 的專用核心）
+    ATR_LENGTH = 14
+    RSI_LENGTH = 14
+    ADX_LENGTH = 14
+    BB_LENGTH = 50
+    SWING_LENGTH = 50
+    EMA_LENGTH = 200
+    
     def __init__(self, execution_system):
         self.exec = execution_system
         # AI 已移除 - 純技術邏輯
@@ -29,40 +42,116 @@ class HybridSFPStrategy:
         # API 節流：已經問過 AI 的 K 線，無論結果如何，都不再重複問
         self.analyzed_candles = set()
         
+        # K 線環形緩衝區：symbol -> (BUF_SIZE, 6) float64 陣列，timestamp 以毫秒存放
+        # 緩衝區就緒後每次掃描只寫入新 K 線，不再重抓 250 根歷史
+        self._buf = {}
+        self._head = {}   # 下一個寫入位置
+        self._count = {}  # 已填入的 K 線數
+        
         # 簡單印出狀態，方便 debug
         # print(f"   [HybridSFP] 狀態載入: {len(self.last_signal_time)} 筆記錄")
 
     def calculate_indicators(self, df):
         """計算技術指標 (ATR, BB, SFP, EMA)"""
+        high = df['high'].to_numpy(dtype=np.float64)
+        low = df['low'].to_numpy(dtype=np.float64)
+        close = df['close'].to_numpy(dtype=np.float64)
+        
         # 1. ATR (風控核心)
-        df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=14)
-        df['rsi'] = ta.rsi(df['close'], length=14) # 新增 RSI 指標
+        df['atr'] = make_kernel('atr', self.ATR_LENGTH)(high, low, close)
+        df['rsi'] = make_kernel('rsi', self.RSI_LENGTH)(close) # 新增 RSI 指標
         
         # ADX (趨勢強度) - 用於過濾強趨勢逆勢
-        adx_df = ta.adx(df['high'], df['low'], df['close'], length=14)
-        if adx_df is not None:
-            df['adx'] = adx_df[adx_df.columns[0]] # 取得 ADX 值
+        df['adx'] = make_kernel('adx', self.ADX_LENGTH)(high, low, close)
         
         # 2. 布林帶
-        bb = ta.bbands(df['close'], length=50, std=2.0)
-        # 處理欄位名稱 (pandas_ta 產生的名稱可能不同，這裡做通用處理)
-        if bb is not None:
-            df = pd.concat([df, bb], axis=1)
-            # 重新命名方便後續呼叫
-            cols = df.columns
-            df['bb_upper'] = df[cols[cols.str.startswith('BBU')][0]]
-            df['bb_lower'] = df[cols[cols.str.startswith('BBL')][0]]
-            df['bw'] = df[cols[cols.str.startswith('BBB')][0]]
+        bb_lower, _, bb_upper, bw = make_kernel('bbands', self.BB_LENGTH)(close)
+        df['bb_upper'] = bb_upper
+        df['bb_lower'] = bb_lower
+        df['bw'] = bw
 
-        # 3. Swing High/Low (SFP 用)
-        df['swing_high'] = df['high'].rolling(window=50).max().shift(1)
-        df['swing_low'] = df['low'].rolling(window=50).min().shift(1)
+        # 3. Swing High/Low (SFP 用)：前 SWING_LENGTH 根（不含當根）的極值，與回測共用同一核心
+        df['swing_high'], df['swing_low'] = make_kernel('swing', self.SWING_LENGTH)(high, low)
         
         # 4. EMA 200 (趨勢過濾)
-        df['ema200'] = ta.ema(df['close'], length=200)
+        df['ema200'] = make_kernel('ema', self.EMA_LENGTH)(close)
+        
+        return df
+
+    def _reset_buffer(self, symbol):
+        self._buf.pop(symbol, None)
+        self._head.pop(symbol, None)
+        self._count.pop(symbol, None)
+
+    def _update_buffer(self, symbol, df):
+        """
+        將抓到的 K 線寫入環形緩衝區
+        :return: False 表示新數據與緩衝區不連續（例如停機一段時間），需重抓完整歷史
+        """
+        rows = np.empty((len(df), 6), dtype=np.float64)
+        rows[:, 0] = df['timestamp'].to_numpy().astype('datetime64[ms]').astype(np.int64)
+        rows[:, 1:] = df[self.OHLCV_COLUMNS[1:]].to_numpy(dtype=np.float64)
+        
+        buf = self._buf.get(symbol)
+        if buf is None:
+            rows = rows[-self.BUF_SIZE:]
+            buf = np.zeros((self.BUF_SIZE, 6), dtype=np.float64)
+            buf[:len(rows)] = rows
+            self._buf[symbol] = buf
+            self._head[symbol] = len(rows) % self.BUF_SIZE
+            self._count[symbol] = len(rows)
+            return True
         
+        head = self._head[symbol]
+        count = self._count[symbol]
+        last_ts = buf[(head - 1) % self.BUF_SIZE, 0]
+        if len(rows) == 0 or rows[0, 0] > last_ts:
+            return False
+        
+        for row in rows:
+            if row[0] == last_ts:
+                # 同一根 K 線（未收盤的最新一根）直接覆寫
+                buf[(head - 1) % self.BUF_SIZE] = row
+            elif row[0] > last_ts:
+                buf[head] = row
+                head = (head + 1) % self.BUF_SIZE
+                count = min(count + 1, self.BUF_SIZE)
+                last_ts = row[0]
+        
+        self._head[symbol] = head
+        self._count[symbol] = count
+        return True
+
+    def _get_window(self, symbol):
+        """依時間順序取出緩衝區中的 K 線 DataFrame"""
+        buf = self._buf[symbol]
+        count = self._count[symbol]
+        if count < self.BUF_SIZE:
+            window = buf[:count]
+        else:
+            head = self._head[symbol]
+            window = np.concatenate((buf[head:], buf[:head]))
+        
+        df = pd.DataFrame(window, columns=self.OHLCV_COLUMNS)
+        df['timestamp'] = pd.to_datetime(window[:, 0].astype(np.int64), unit='ms')
         return df
 
+    async def _fetch_window(self, symbol):
+        """抓取 K 線並更新緩衝區，回傳完整視窗"""
+        warm = self._count.get(symbol, 0) >= self.FULL_LIMIT
+        df = await self.exec.fetch_ohlcv(limit=self.INCREMENTAL_LIMIT if warm else self.FULL_LIMIT)
+        if df is None:
+            return None
+        
+        if not self._update_buffer(symbol, df):
+            self._reset_buffer(symbol)
+            df = await self.exec.fetch_ohlcv(limit=self.FULL_LIMIT)
+            if df is None:
+                return None
+            self._update_buffer(symbol, df)
+        
+        return self._get_window(symbol)
+
     def check_signals(self, df):
         """核心邏輯: SFP 優先，Trend 其次"""
         prev = df.iloc[-2] # 確認收盤的 K 線
@@ -140,7 +229,7 @@ class HybridSFPStrategy:
             
             # 這裡我們用 4h 數據，因為此策略設計為波段
             self.exec.timeframe = self.timeframe 
-            df = await self.exec.fetch_ohlcv(limit=250) # 需要 200 EMA + 50 Rolling
+            df = await self._fetch_window(symbol) # 需要 200 EMA + 50 Rolling
             
             if df is None or len(df) < 210: continue
             
@@ -9,6 +9,7 @@ SMC (Smart Money Concepts) 偵測器
 
 import pandas as pd
 import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
 from typing import Dict, List, Optional
 
 
@@ -183,22 +184,91 @@ class SMCDetector:
         """
         掃描整個數據集，偵測所有 SMC 結構
         
+        以整欄陣列一次判斷，結果與逐根呼叫 detect_order_block / detect_fvg 相同
+        
         Args:
             df: K線數據
         """
+        self.scan_order_blocks(df)
+        self.scan_fvgs(df)
+    
+    def scan_order_blocks(self, df: pd.DataFrame):
+        """
+        偵測所有 Order Blocks（需包含 atr 欄位）
+        
+        候選 K 線不含最後 5 根，往後檢查也只到倒數第 2 根；最新一根未收盤時結果不變
+        """
         self.order_blocks = []
-        self.fvgs = []
         
-        # 掃描 Order Blocks
-        for i in range(len(df) - 5):
-            ob = self.detect_order_block(df, i)
-            if ob:
+        n = len(df)
+        timestamps = df['timestamp']
+        o = df['open'].to_numpy(dtype=np.float64)
+        h = df['high'].to_numpy(dtype=np.float64)
+        l = df['low'].to_numpy(dtype=np.float64)
+        c = df['close'].to_numpy(dtype=np.float64)
+        
+        # 掃描 Order Blocks（第 i 根與其後 4 根 K 線）
+        m = n - 5
+        if m > 0 and 'atr' in df.columns:
+            atr = df['atr'].to_numpy(dtype=np.float64)[:m]
+            body = np.abs(c[:m] - o[:m])
+            strong = body >= self.atr_multiplier * atr  # ATR 為 NaN 時自動為 False
+            future = sliding_window_view(c[1:], 4)[:m]  # future[i] = close[i+1:i+5]
+            
+            bullish = strong & (c[:m] < o[:m]) & (future.min(axis=1) > l[:m])
+            bearish = strong & (c[:m] > o[:m]) & (future.max(axis=1) < h[:m])
+            
+            for i in np.flatnonzero(bullish | bearish):
+                if bullish[i]:
+                    ob = {
+                        'type': 'BULLISH_OB',
+                        'zone_low': l[i],
+                        'zone_high': o[i],
+                    }
+                else:
+                    ob = {
+                        'type': 'BEARISH_OB',
+                        'zone_low': c[i],
+                        'zone_high': h[i],
+                    }
+                ob['timestamp'] = timestamps.iloc[i]
+                ob['strength'] = body[i] / atr[i]
                 self.order_blocks.append(ob)
+    
+    def scan_fvgs(self, df: pd.DataFrame):
+        """
+        偵測所有 FVG（K1 = i-2, K3 = i）
         
-        # 掃描 FVGs
-        for i in range(2, len(df)):
-            fvg = self.detect_fvg(df, i)
-            if fvg:
+        包含最新一根 K 線，未收盤時會隨價格變動，需每次重算
+        """
+        self.fvgs = []
+        
+        n = len(df)
+        timestamps = df['timestamp']
+        h = df['high'].to_numpy(dtype=np.float64)
+        l = df['low'].to_numpy(dtype=np.float64)
+        
+        if n >= 3:
+            bullish_gap = h[:-2] < l[2:]
+            bearish_gap = l[:-2] > h[2:]
+            
+            for k in np.flatnonzero(bullish_gap | bearish_gap):
+                i = k + 2
+                if bullish_gap[k]:
+                    fvg = {
+                        'type': 'BULLISH_FVG',
+                        'gap_low': h[k],
+                        'gap_high': l[i],
+                        'size': l[i] - h[k],
+                    }
+                else:
+                    fvg = {
+                        'type': 'BEARISH_FVG',
+                        'gap_low': h[i],
+                        'gap_high': l[k],
+                        'size': l[k] - h[i],
+                    }
+                fvg['timestamp'] = timestamps.iloc[i]
                 self.fvgs.append(fvg)
     
     # ==================== 輔助判斷函數 ====================
@@ -282,7 +352,7 @@ class SMCDetector:
 
 def test_smc_detector():
     """測試 SMC 偵測器"""
-    import pandas_ta as ta
+    from core.indicator_kernels import atr14
     
     print("🧪 測試 SMC 偵測器\n")
     
@@ -294,7 +364,11 @@ def test_smc_detector():
     df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
     
     # 計算 ATR
-    df['atr'] = ta.atr(df['high'], df['low'], df['close'], length=14)
+    df['atr'] = atr14(
+        df['high'].to_numpy(dtype=np.float64),
+        df['low'].to_numpy(dtype=np.float64),
+        df['close'].to_numpy(dtype=np.float64)
+    )
     
     # 初始化偵測器
     detector = SMCDetector()